@@ -0,0 +1,201 @@
+"""Stub su/pidof/am executables that simulate a rooted Android device."""
+import errno
+import os
+import signal
+import sys
+import time
+from collections import Counter
+
+SU_STUB = """#!/bin/sh
+echo su >> "{state}/spawns.log"
+exec sh "$@"
+"""
+
+PIDOF_STUB = """#!{python}
+import os, sys
+
+with open(os.path.join({state!r}, "spawns.log"), "a") as f:
+    f.write("pidof\\n")
+
+names = set(sys.argv[1:])
+pids = []
+for entry in os.listdir("/proc"):
+    if not entry.isdigit():
+        continue
+    try:
+        with open(f"/proc/{{entry}}/cmdline", "rb") as f:
+            argv0 = f.read().split(b"\\0")[0].decode()
+        with open(f"/proc/{{entry}}/stat") as f:
+            state = f.read().rsplit(")", 1)[1].split()[0]
+    except OSError:
+        continue
+    if argv0 in names and state != "Z":
+        pids.append(entry)
+
+if pids:
+    print(" ".join(pids))
+sys.exit(0 if pids else 1)
+"""
+
+AM_STUB = """#!{python}
+import os, signal, subprocess, sys, time
+
+STATE = {state!r}
+
+with open(os.path.join(STATE, "spawns.log"), "a") as f:
+    f.write("am\\n")
+
+
+def kill(package):
+    try:
+        with open(os.path.join(STATE, package + ".pid")) as f:
+            os.kill(int(f.read()), signal.SIGKILL)
+    except (OSError, ValueError):
+        pass
+
+
+args = sys.argv[1:]
+if args[0] == "force-stop":
+    kill(args[1])
+elif args[0] == "start":
+    package = args[args.index("-p") + 1]
+    kill(package)
+    time.sleep({am_delay})
+    # argv[0] is the package name, like a real app process forked from zygote
+    proc = subprocess.Popen(
+        [package, "86400"],
+        executable="sleep",
+        start_new_session=True,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    with open(os.path.join(STATE, package + ".pid"), "w") as f:
+        f.write(str(proc.pid))
+    with open(os.path.join(STATE, package + ".launched"), "w") as f:
+        f.write(str(time.time()))
+"""
+
+
+LOGCAT_STUB = """#!{python}
+import os, sys, time
+
+with open(os.path.join({state!r}, "spawns.log"), "a") as f:
+    f.write("logcat\\n")
+
+pid = next(a.split("=", 1)[1] for a in sys.argv[1:] if a.startswith("--pid="))
+path = os.path.join({state!r}, "logcat-" + pid + ".log")
+open(path, "a").close()
+with open(path) as f:
+    f.seek(0, os.SEEK_END)
+    while True:
+        line = f.readline()
+        if not line:
+            time.sleep(0.01)
+            continue
+        try:
+            sys.stdout.write(line)
+            sys.stdout.flush()
+        except BrokenPipeError:
+            break
+"""
+
+
+class FakeAndroid:
+    def __init__(self, root, am_delay=0.3):
+        self.bin_dir = os.path.join(root, "bin")
+        self.state_dir = os.path.join(root, "state")
+        self.am_delay = am_delay
+
+    def install(self):
+        os.makedirs(self.bin_dir, exist_ok=True)
+        os.makedirs(self.state_dir, exist_ok=True)
+        stubs = {
+            "su": SU_STUB,
+            "pidof": PIDOF_STUB,
+            "am": AM_STUB,
+            "logcat": LOGCAT_STUB,
+        }
+        for name, template in stubs.items():
+            path = os.path.join(self.bin_dir, name)
+            with open(path, "w") as f:
+                f.write(
+                    template.format(
+                        python=sys.executable,
+                        state=self.state_dir,
+                        am_delay=self.am_delay,
+                    )
+                )
+            os.chmod(path, 0o755)
+        os.environ["PATH"] = self.bin_dir + os.pathsep + os.environ.get("PATH", "")
+
+    def read_state(self, package, suffix):
+        try:
+            with open(os.path.join(self.state_dir, f"{package}.{suffix}")) as f:
+                return f.read().strip()
+        except OSError:
+            return None
+
+    def pid(self, package):
+        pid = self.read_state(package, "pid")
+        return int(pid) if pid else None
+
+    def launched_at(self, package):
+        launched = self.read_state(package, "launched")
+        return float(launched) if launched else None
+
+    def is_running(self, package):
+        pid = self.pid(package)
+        if not pid:
+            return False
+        try:
+            with open(f"/proc/{pid}/stat") as f:
+                return f.read().rsplit(")", 1)[1].split()[0] != "Z"
+        except OSError:
+            return False
+
+    def log(self, package, message):
+        # Appears in a running `logcat --pid` stream of the client
+        pid = self.pid(package)
+        if pid:
+            with open(os.path.join(self.state_dir, f"logcat-{pid}.log"), "a") as f:
+                f.write(f"I/Roblox  ({pid:>5}): {message}\n")
+
+    def crash(self, package):
+        pid = self.pid(package)
+        if pid and self.is_running(package):
+            os.kill(pid, signal.SIGKILL)
+        return time.monotonic()
+
+    def hide_proc(self, module):
+        # Like hidepid=2 for a non-root app: another process's /proc/<pid>
+        # does not exist for the module's own reads, only through su
+        own = str(os.getpid())
+
+        def hidden_open(path, *args, **kwargs):
+            parts = str(path).split("/")
+            if len(parts) > 2 and parts[1] == "proc" and parts[2].isdigit():
+                if parts[2] != own:
+                    raise FileNotFoundError(
+                        errno.ENOENT, os.strerror(errno.ENOENT), path
+                    )
+            return open(path, *args, **kwargs)
+
+        module.open = hidden_open
+
+    def show_proc(self, module):
+        module.__dict__.pop("open", None)
+
+    def spawns(self):
+        try:
+            with open(os.path.join(self.state_dir, "spawns.log")) as f:
+                return Counter(line.strip() for line in f if line.strip())
+        except OSError:
+            return Counter()
+
+    def cleanup(self):
+        for entry in os.listdir(self.state_dir):
+            if entry.endswith(".pid"):
+                package = entry[: -len(".pid")]
+                if self.is_running(package):
+                    os.kill(self.pid(package), signal.SIGKILL)
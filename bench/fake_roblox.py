@@ -0,0 +1,189 @@
+"""Local stand-in for the Roblox presence, games, users and thumbnails APIs."""
+import json
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+PRESENCE_OFFLINE = 0
+PRESENCE_ONLINE = 1
+PRESENCE_IN_GAME = 2
+
+
+class FakeUser:
+    def __init__(self, user_id, package, game_id):
+        self.user_id = str(user_id)
+        self.package = package
+        self.game_id = game_id
+        self.mode = "normal"
+        self.mode_since = 0.0
+        self.launched_at = None
+        self.loaded = 0.0
+
+
+class FakeRoblox:
+    def __init__(self, device, join_delay=3.0, latency=0.0, cores=0):
+        self.device = device
+        self.join_delay = join_delay
+        self.latency = latency
+        # With cores set, clients loading at the same time share that many CPUs
+        # and each needs join_delay seconds of one to get in-game
+        self.cores = cores
+        self.advanced_at = time.monotonic()
+        self.users = {}
+        self.calls = Counter()
+        self.outage_until = 0.0
+        self.lock = threading.Lock()
+        self.server = None
+
+    @property
+    def url(self):
+        host, port = self.server.server_address
+        return f"http://{host}:{port}"
+
+    def add_user(self, user_id, package, game_id):
+        self.users[str(user_id)] = FakeUser(user_id, package, game_id)
+
+    def set_mode(self, user_id, mode):
+        user = self.users[str(user_id)]
+        user.mode = mode
+        user.mode_since = time.time()
+
+    def kick(self, user_id):
+        self.set_mode(user_id, "kicked")
+        self.device.log(
+            self.users[str(user_id)].package,
+            "[FLog::Network] Client has been kicked: You have been kicked from "
+            "this experience (Error Code: 267)",
+        )
+
+    def switch_server(self, user_id):
+        self.set_mode(user_id, "public")
+
+    def outage(self, seconds):
+        self.outage_until = time.time() + seconds
+
+    def advance(self):
+        now = time.monotonic()
+        elapsed, self.advanced_at = now - self.advanced_at, now
+        loading = []
+        for user in self.users.values():
+            launched_at = self.device.launched_at(user.package)
+            if launched_at != user.launched_at:
+                user.launched_at = launched_at
+                user.loaded = 0.0
+            if (
+                launched_at
+                and self.device.is_running(user.package)
+                and user.loaded < self.join_delay
+            ):
+                loading.append(user)
+        if loading:
+            share = min(1.0, self.cores / len(loading))
+            for user in loading:
+                user.loaded += elapsed * share
+
+    def run_clock(self):
+        while self.server is not None:
+            with self.lock:
+                self.advance()
+            time.sleep(0.05)
+
+    def joined(self, user, launched_at):
+        if self.cores:
+            return user.launched_at == launched_at and user.loaded >= self.join_delay
+        return time.time() - launched_at >= self.join_delay
+
+    def presence(self, user_id):
+        user = self.users.get(str(user_id))
+        if user is None:
+            return {"userId": int(user_id), "userPresenceType": PRESENCE_OFFLINE}
+
+        launched_at = self.device.launched_at(user.package)
+        # Relaunching the client puts the user back on the private server
+        if user.mode != "normal" and launched_at and launched_at > user.mode_since:
+            user.mode = "normal"
+
+        presence = {"userId": int(user.user_id), "userPresenceType": PRESENCE_ONLINE}
+        if not self.device.is_running(user.package):
+            presence["userPresenceType"] = PRESENCE_OFFLINE
+        elif not launched_at or not self.joined(user, launched_at):
+            pass
+        elif user.mode == "kicked":
+            pass
+        else:
+            presence["userPresenceType"] = PRESENCE_IN_GAME
+            presence["universeId"] = 1
+            presence["gameId"] = (
+                f"public-{user.mode_since}" if user.mode == "public" else user.game_id
+            )
+        return presence
+
+    def handle(self, method, path, query, body):
+        service = path.strip("/").split("/")[0]
+        with self.lock:
+            self.calls[service] += 1
+
+        if self.latency:
+            time.sleep(self.latency)
+        if time.time() < self.outage_until:
+            return 503, {"errors": [{"message": "Service unavailable"}]}
+
+        if service == "presence":
+            user_ids = json.loads(body or b"{}").get("userIds", [])
+            return 200, {"userPresences": [self.presence(u) for u in user_ids]}
+        if service == "games":
+            ids = query.get("universeIds", ["1"])[0].split(",")
+            return 200, {"data": [{"id": int(i), "name": f"Game {i}"} for i in ids]}
+        if service == "thumbnails":
+            ids = query.get("userIds", ["1"])[0].split(",")
+            return 200, {
+                "data": [
+                    {"targetId": int(i), "imageUrl": f"https://example.invalid/{i}.png"}
+                    for i in ids
+                ]
+            }
+        if service == "users":
+            user_id = path.rstrip("/").split("/")[-1]
+            return 200, {"id": user_id, "name": f"user{user_id}", "displayName": "User"}
+        return 404, {}
+
+    def start(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def respond(self, method):
+                parts = urlsplit(self.path)
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length) if length else b""
+                status, data = fake.handle(
+                    method, parts.path, parse_qs(parts.query), body
+                )
+                payload = json.dumps(data).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def do_GET(self):
+                self.respond("GET")
+
+            def do_POST(self):
+                self.respond("POST")
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        if self.cores:
+            threading.Thread(target=self.run_clock, daemon=True).start()
+
+    def stop(self):
+        if self.server:
+            self.server.shutdown()
+            self.server = None
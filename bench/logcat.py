@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""Check the logcat disconnect parser against hand-written logcat fixtures.
+
+The fixtures in bench/fixtures/logcat are not device captures. They are
+written by hand in `logcat -v brief` format, using the disconnect, kick and
+teleport messages the parser looks for, so replace them with real captures
+when a device is at hand. Each one is fed to main.LogcatParser whole and in
+random small chunks (the way a pipe delivers it). The events must match
+EXPECTED either way. Then the parser's throughput on normal in-game output
+is measured:
+
+    python bench/logcat.py
+"""
+import os
+import random
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+FIXTURES = os.path.join(BENCH_DIR, "fixtures", "logcat")
+sys.path.insert(0, REPO_DIR)
+os.environ.setdefault("DISCORD_ENABLED", "false")
+
+import main as auto_rejoin  # noqa: E402
+
+EXPECTED = {
+    "in_game.log": [],
+    "disconnect_277.log": [
+        "Disconnected",
+        "Disconnected (Error 277)",
+        "Disconnected (Error 277)",
+    ],
+    "kicked_267.log": ["Kicked (Error 267)", "Disconnected (Error 267)"],
+    "same_account_273.log": [
+        "Disconnected (Error 273)",
+        "Disconnected (Error 273)",
+    ],
+    "teleport_failed.log": ["Teleport failed (Error 772)"],
+}
+
+
+def feed_chunked(data, rng):
+    parser = auto_rejoin.LogcatParser()
+    events = []
+    position = 0
+    while position < len(data):
+        size = rng.randint(1, 64)
+        events.extend(parser.feed(data[position : position + size]))
+        position += size
+    return events
+
+
+def check_fixtures():
+    rng = random.Random(0)
+    failures = 0
+    for name in sorted(os.listdir(FIXTURES)):
+        with open(os.path.join(FIXTURES, name), "rb") as f:
+            data = f.read()
+        whole = auto_rejoin.LogcatParser().feed(data)
+        chunked = feed_chunked(data, rng)
+        expected = EXPECTED.get(name)
+        ok = whole == chunked == expected
+        failures += not ok
+        print(f"{'ok' if ok else 'FAIL':<6}{name:<24}{whole}")
+        if not ok:
+            print(f"      expected {expected}, chunked {chunked}")
+    return failures
+
+
+def measure_throughput(seconds=1.0):
+    with open(os.path.join(FIXTURES, "in_game.log"), "rb") as f:
+        data = f.read()
+    lines = data.count(b"\n")
+    parser = auto_rejoin.LogcatParser()
+    fed = 0
+    started = time.perf_counter()
+    while time.perf_counter() - started < seconds:
+        parser.feed(data)
+        fed += lines
+    return fed / (time.perf_counter() - started)
+
+
+def main():
+    failures = check_fixtures()
+    print(f"\nparser throughput: {measure_throughput():,.0f} lines/s")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+"""Measure time-to-detect and time-to-recover of the rejoin loop.
+
+Runs main.py's supervisor against a fake Roblox API and stub su/pidof/am
+executables, so no device or network is needed:
+
+    python bench/run.py --scenario crash --reps 5
+
+The fleet scenario crashes every client at once; with --cores the fake
+clients compete for CPU while loading, like cold starts on one device.
+With --hidden-proc, main.py can only read the clients' /proc entries
+through su, as when it runs as the Termux user on Android 7+.
+"""
+import argparse
+import contextlib
+import io
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+from fake_android import FakeAndroid  # noqa: E402
+from fake_roblox import FakeRoblox  # noqa: E402
+
+PACKAGE = "com.roblox.client"
+USER_ID = "12345678"
+GAME_ID = "private-server"
+TIMEOUT = 180.0
+
+
+def percentile(values, pct):
+    if not values:
+        return None
+    values = sorted(values)
+    index = min(len(values) - 1, max(0, round(pct / 100 * len(values) + 0.5) - 1))
+    return values[index]
+
+
+class Harness:
+    def __init__(self, args):
+        self.args = args
+        self.tmp = tempfile.TemporaryDirectory(prefix="auto-rejoin-bench-")
+        self.device = FakeAndroid(self.tmp.name, args.am_delay)
+        self.device.install()
+        self.fake = FakeRoblox(
+            self.device, args.join_delay, args.api_latency, args.cores
+        )
+        self.fake.start()
+        self.clients = [
+            (str(int(USER_ID) + i), PACKAGE if i == 0 else f"{PACKAGE}{i}")
+            for i in range(args.clients)
+        ]
+        for user_id, package in self.clients:
+            self.fake.add_user(user_id, package, GAME_ID)
+
+        # main.py reads its configuration at import time
+        os.chdir(self.tmp.name)
+        os.environ.update(
+            {
+                "ROBLOX_API_BASE_URL": self.fake.url,
+                "METADATA_CACHE_FILE": os.path.join(self.tmp.name, "cache.json"),
+                "DISCORD_ENABLED": "false",
+                "LAUNCH_CONCURRENCY": str(args.launch_concurrency),
+            }
+        )
+        sys.path.insert(0, REPO_DIR)
+        import main
+
+        self.main = main
+        main.roblox_api.base_url = self.fake.url
+        main.proc_reader.hidden = None
+        if args.hidden_proc:
+            self.device.hide_proc(main)
+        self.events = []
+        self.monitors = [self.make_monitor(*client) for client in self.clients]
+        self.monitor = self.monitors[0]
+        if args.engine == "async":
+            self.supervisor = main.AsyncEngine(self.monitors)
+        else:
+            self.supervisor = main.FleetSupervisor(self.monitors)
+        self.thread = None
+
+    def make_monitor(self, user_id, package):
+        main = self.main
+        events = self.events
+
+        class TimedMonitor(main.AccountMonitor):
+            def launch(self, leaving_game_id=None):
+                events.append(("launch", time.monotonic(), self))
+                return super().launch(leaving_game_id)
+
+            def confirm_rejoin(self, presence):
+                super().confirm_rejoin(presence)
+                # A join that timed out is not a recovery
+                if self.last_game_id:
+                    events.append(("recovered", time.monotonic(), self))
+
+        account = main.Account(
+            user_id,
+            "https://www.roblox.com/share?code=BENCH",
+            package,
+            name=package,
+        )
+        return TimedMonitor(
+            account,
+            main.DiscordNotifier(user_id),
+            self.args.interval,
+            self.args.restart_delay,
+            join_timeout=self.args.join_timeout,
+            min_interval=self.args.min_interval,
+            max_interval=self.args.max_interval,
+        )
+
+    def start(self):
+        if self.args.engine == "sync":
+            self.supervisor.start()
+        self.thread = threading.Thread(target=self.supervisor.run, daemon=True)
+        self.thread.start()
+        self.wait_until(self.steady)
+
+    def steady(self):
+        return all(
+            m.started and m.confirm_at is None and not m.launch_pending
+            for m in self.monitors
+        )
+
+    def stop(self):
+        self.supervisor.stop()
+        self.thread.join(self.args.interval + 5)
+        # The next harness installs stubs in a new directory
+        self.main.root_shell.close()
+        self.device.show_proc(self.main)
+        self.device.cleanup()
+        self.fake.stop()
+
+    def wait_until(self, predicate, timeout=TIMEOUT):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if predicate():
+                return True
+            time.sleep(0.01)
+        return False
+
+    def event_after(self, name, since, monitor=None):
+        for event, at, source in self.events:
+            if event == name and at >= since and monitor in (None, source):
+                return at
+        return None
+
+    def recovered_after(self, since, monitors):
+        # The fleet has recovered once every monitor has
+        times = [self.event_after("recovered", since, m) for m in monitors]
+        return None if None in times else max(times)
+
+    def settle(self):
+        # Start every repetition from a steady in-game state at a random phase
+        self.wait_until(self.steady)
+        time.sleep(self.args.interval * random.uniform(0.25, 0.75))
+
+    def measure(self, failure, monitors=None):
+        monitors = monitors or [self.monitor]
+        self.settle()
+        started = time.monotonic()
+        failure()
+        if not self.wait_until(lambda: self.event_after("launch", started)):
+            return None, None
+        detected = self.event_after("launch", started)
+        if not self.wait_until(lambda: self.recovered_after(started, monitors)):
+            return detected - started, None
+        return detected - started, self.recovered_after(started, monitors) - started
+
+
+def scenario_crash(h):
+    return h.measure(lambda: h.device.crash(PACKAGE))
+
+
+def scenario_kick(h):
+    return h.measure(lambda: h.fake.kick(USER_ID))
+
+
+def scenario_switch(h):
+    return h.measure(lambda: h.fake.switch_server(USER_ID))
+
+
+def scenario_outage(h):
+    # The client crashes while the presence API is down
+    def failure():
+        h.fake.outage(h.args.interval * 2)
+        h.device.crash(PACKAGE)
+
+    return h.measure(failure)
+
+
+def scenario_stable(h):
+    # Nothing goes wrong: any launch within three intervals counts as a failure
+    h.settle()
+    started = time.monotonic()
+    time.sleep(h.args.interval * 3)
+    if h.event_after("launch", started):
+        return None, None
+    return 0.0, 0.0
+
+
+def scenario_fleet(h):
+    def failure():
+        for _, package in h.clients:
+            h.device.crash(package)
+
+    return h.measure(failure, h.monitors)
+
+
+SCENARIOS = {
+    "crash": scenario_crash,
+    "kick": scenario_kick,
+    "switch": scenario_switch,
+    "outage": scenario_outage,
+    "fleet": scenario_fleet,
+    "stable": scenario_stable,
+}
+
+
+def format_seconds(value):
+    return "-" if value is None else f"{value:.2f}s"
+
+
+def run_scenario(name, args):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return measure_scenario(name, args)
+
+
+def measure_scenario(name, args):
+    harness = Harness(args)
+    try:
+        harness.start()
+        calls_before = sum(harness.fake.calls.values())
+        spawns_before = harness.device.spawns()
+
+        detect, recover = [], []
+        for _ in range(args.reps):
+            d, r = SCENARIOS[name](harness)
+            if d is not None:
+                detect.append(d)
+            if r is not None:
+                recover.append(r)
+
+        calls = sum(harness.fake.calls.values()) - calls_before
+        spawns = harness.device.spawns() - spawns_before
+    finally:
+        harness.stop()
+
+    return {
+        "scenario": name,
+        "reps": args.reps,
+        "detect_p50": percentile(detect, 50),
+        "detect_p95": percentile(detect, 95),
+        "recover_p50": percentile(recover, 50),
+        "recover_p95": percentile(recover, 95),
+        "failed": args.reps - len(recover),
+        "http_calls": calls / args.reps,
+        "spawns": sum(spawns.values()) / args.reps,
+        "su_spawns": spawns["su"] / args.reps,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--scenario", choices=sorted(SCENARIOS) + ["all"], default="all"
+    )
+    parser.add_argument("--engine", choices=["sync", "async"], default="sync")
+    parser.add_argument("--reps", type=int, default=5)
+    parser.add_argument("--interval", type=int, default=10)
+    parser.add_argument("--min-interval", type=int, default=None)
+    parser.add_argument("--max-interval", type=int, default=None)
+    parser.add_argument("--restart-delay", type=int, default=15)
+    parser.add_argument("--join-delay", type=float, default=3.0)
+    parser.add_argument("--api-latency", type=float, default=0.05)
+    parser.add_argument("--am-delay", type=float, default=0.3)
+    parser.add_argument("--join-timeout", type=int, default=None)
+    parser.add_argument("--clients", type=int, default=1)
+    parser.add_argument("--cores", type=float, default=0)
+    parser.add_argument("--launch-concurrency", type=int, default=2)
+    parser.add_argument(
+        "--hidden-proc",
+        action="store_true",
+        help="hide other processes' /proc entries like Android's hidepid=2",
+    )
+    args = parser.parse_args()
+
+    names = sorted(SCENARIOS) if args.scenario == "all" else [args.scenario]
+    print(
+        f"{'scenario':<10}{'detect p50':>12}{'p95':>9}{'recover p50':>13}{'p95':>9}"
+        f"{'failed':>8}{'http/rep':>10}{'spawn/rep':>11}{'su/rep':>8}"
+    )
+    for name in names:
+        result = run_scenario(name, args)
+        print(
+            f"{name:<10}"
+            f"{format_seconds(result['detect_p50']):>12}"
+            f"{format_seconds(result['detect_p95']):>9}"
+            f"{format_seconds(result['recover_p50']):>13}"
+            f"{format_seconds(result['recover_p95']):>9}"
+            f"{result['failed']:>8}"
+            f"{result['http_calls']:>10.1f}"
+            f"{result['spawns']:>11.1f}"
+            f"{result['su_spawns']:>8.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
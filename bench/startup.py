@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""Measure how long main.py takes to start monitoring after launch.
+
+Starts main.py as a fresh process against a fake Roblox API and stub
+su/pidof/am executables, and times how long it takes to import, and to
+reach the first Roblox launch:
+
+    python bench/startup.py --reps 5 --api-latency 0.05,10
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+from fake_android import FakeAndroid  # noqa: E402
+from fake_roblox import FakeRoblox  # noqa: E402
+from run import GAME_ID, PACKAGE, USER_ID, percentile  # noqa: E402
+
+MAIN = os.path.join(REPO_DIR, "main.py")
+TIMEOUT = 60.0
+
+
+def measure_import():
+    started = time.monotonic()
+    subprocess.run(
+        [sys.executable, "-c", "import main"],
+        cwd=REPO_DIR,
+        env=dict(os.environ, DISCORD_ENABLED="false"),
+        check=True,
+        stdout=subprocess.DEVNULL,
+    )
+    return time.monotonic() - started
+
+
+def measure_launch(latency):
+    with tempfile.TemporaryDirectory(prefix="auto-rejoin-startup-") as tmp:
+        device = FakeAndroid(tmp, am_delay=0)
+        device.install()
+        fake = FakeRoblox(device, latency=latency)
+        fake.start()
+        fake.add_user(USER_ID, PACKAGE, GAME_ID)
+        open(os.path.join(tmp, ".env"), "w").close()
+
+        env = dict(
+            os.environ,
+            PS_LINK="https://www.roblox.com/share?code=BENCH",
+            USER_ID=USER_ID,
+            ROBLOX_API_BASE_URL=fake.url,
+            DISCORD_ENABLED="true",
+            DISCORD_WEBHOOK_URL=f"{fake.url}/webhook",
+        )
+        started = time.monotonic()
+        proc = subprocess.Popen(
+            [sys.executable, MAIN],
+            cwd=tmp,
+            env=env,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        try:
+            deadline = started + TIMEOUT
+            while time.monotonic() < deadline and proc.poll() is None:
+                if device.launched_at(PACKAGE):
+                    return time.monotonic() - started
+                time.sleep(0.005)
+            return None
+        finally:
+            proc.kill()
+            proc.wait()
+            device.cleanup()
+            fake.stop()
+
+
+def format_seconds(value):
+    return "-" if value is None else f"{value:.2f}s"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--reps", type=int, default=5)
+    parser.add_argument(
+        "--api-latency",
+        default="0.05,10",
+        help="comma separated API latencies to measure, in seconds",
+    )
+    args = parser.parse_args()
+
+    imports = [measure_import() for _ in range(args.reps)]
+    print(f"{'case':<16}{'p50':>9}{'p95':>9}{'failed':>8}")
+    print(
+        f"{'import':<16}"
+        f"{format_seconds(percentile(imports, 50)):>9}"
+        f"{format_seconds(percentile(imports, 95)):>9}"
+        f"{0:>8}"
+    )
+
+    for latency in (float(value) for value in args.api_latency.split(",")):
+        results = [measure_launch(latency) for _ in range(args.reps)]
+        launched = [r for r in results if r is not None]
+        print(
+            f"{f'launch @{latency:g}s':<16}"
+            f"{format_seconds(percentile(launched, 50)):>9}"
+            f"{format_seconds(percentile(launched, 95)):>9}"
+            f"{len(results) - len(launched):>8}"
+        )
+
+
+if __name__ == "__main__":
+    main()
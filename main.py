@@ -1,18 +1,538 @@
 import os
+import re
+import errno
+import json
+import math
+import signal
+import functools
 import time
+import atexit
+import select
+import random
+import threading
 import subprocess
-import requests
+from collections import OrderedDict, deque
+from contextlib import contextmanager
 from datetime import datetime, timezone
-from dotenv import load_dotenv
-import psutil
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+from dotenv import dotenv_values, load_dotenv
 
+# load_dotenv() doesn't override these, so a reload of .env must not either
+PROCESS_ENV_KEYS = frozenset(os.environ)
 load_dotenv()
 
 ROBLOX_PACKAGE = "com.roblox.client"
+PRESENCE_BATCH_SIZE = 50
+
+
+class Metrics:
+    LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+    REJOIN_BUCKETS = (5, 10, 15, 20, 30, 45, 60, 90, 120, 180, 300)
+
+    def __init__(self):
+        self.types = {}
+        self.values = {}
+        self.histograms = {}
+        self.collectors = []
+        self.lock = threading.Lock()
+
+    def describe(self, name, metric_type, help_text):
+        self.types[name] = (metric_type, help_text)
+
+    def inc(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + value
+
+    def set(self, name, value, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.values[key] = value
+
+    def observe(self, name, value, buckets=LATENCY_BUCKETS, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            if key not in self.histograms:
+                self.histograms[key] = [buckets, [0] * len(buckets), 0.0, 0]
+            histogram = self.histograms[key]
+            for i, bound in enumerate(buckets):
+                if value <= bound:
+                    histogram[1][i] += 1
+            histogram[2] += value
+            histogram[3] += 1
+
+    def format_labels(self, labels):
+        if not labels:
+            return ""
+        pairs = []
+        for key, value in labels:
+            value = str(value).replace("\\", "\\\\").replace('"', '\\"')
+            pairs.append(f'{key}="{value}"')
+        return "{" + ",".join(pairs) + "}"
+
+    def render(self):
+        for collect in self.collectors:
+            try:
+                collect()
+            except Exception as e:
+                pass
+
+        lines = []
+        with self.lock:
+            for name, (metric_type, help_text) in sorted(self.types.items()):
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {metric_type}")
+                for (key_name, labels), value in sorted(self.values.items()):
+                    if key_name == name:
+                        lines.append(f"{name}{self.format_labels(labels)} {value}")
+                for (key_name, labels), histogram in sorted(self.histograms.items()):
+                    if key_name != name:
+                        continue
+                    buckets, counts, total, count = histogram
+                    for bound, bucket_count in zip(buckets, counts):
+                        bucket_labels = labels + (("le", bound),)
+                        lines.append(
+                            f"{name}_bucket{self.format_labels(bucket_labels)} {bucket_count}"
+                        )
+                    inf_labels = labels + (("le", "+Inf"),)
+                    lines.append(f"{name}_bucket{self.format_labels(inf_labels)} {count}")
+                    lines.append(f"{name}_sum{self.format_labels(labels)} {total}")
+                    lines.append(f"{name}_count{self.format_labels(labels)} {count}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
+metrics.describe(
+    "auto_rejoin_rejoins_total", "counter", "Rejoins started, by account and reason"
+)
+metrics.describe(
+    "auto_rejoin_presence_api_seconds", "histogram", "Presence API request latency"
+)
+metrics.describe(
+    "auto_rejoin_shell_command_seconds", "histogram", "Shell command latency"
+)
+metrics.describe(
+    "auto_rejoin_rejoin_duration_seconds",
+    "histogram",
+    "Time from detecting a problem to being back in-game",
+)
+metrics.describe("auto_rejoin_in_game", "gauge", "1 if the account is in-game")
+metrics.describe(
+    "auto_rejoin_roblox_rss_bytes", "gauge", "Resident memory of Roblox processes"
+)
+metrics.describe(
+    "auto_rejoin_roblox_cpu_percent", "gauge", "CPU usage of Roblox processes"
+)
+metrics.describe("auto_rejoin_system_cpu_percent", "gauge", "System CPU usage")
+metrics.describe("auto_rejoin_system_ram_percent", "gauge", "System RAM usage")
+
+
+def start_metrics_server(host, port):
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    def collect_system():
+        snapshot = system_sampler.snapshot()
+        metrics.set("auto_rejoin_roblox_rss_bytes", snapshot["roblox_rss_mb"] * 1024**2)
+        metrics.set("auto_rejoin_roblox_cpu_percent", snapshot["roblox_cpu_percent"])
+        metrics.set("auto_rejoin_system_cpu_percent", snapshot["cpu_percent"])
+        metrics.set("auto_rejoin_system_ram_percent", snapshot["ram_percent"])
+
+    metrics.collectors.append(collect_system)
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = metrics.render().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+    return server
+
+
+class Tracer:
+    def __init__(self, path):
+        self.path = path
+        self.file = None
+        self.lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return bool(self.path)
+
+    def record(self, span):
+        line = json.dumps(span, default=str)
+        with self.lock:
+            if self.file is None:
+                self.file = open(self.path, "a", buffering=1)
+            self.file.write(line + "\n")
+
+    @contextmanager
+    def span(self, name, **attrs):
+        if not self.enabled:
+            yield attrs
+            return
+
+        started_at = time.time()
+        started = time.perf_counter()
+        attrs["outcome"] = "ok"
+        try:
+            yield attrs
+        except Exception as e:
+            attrs["outcome"] = "error"
+            attrs["error"] = type(e).__name__
+            raise
+        finally:
+            span = {
+                "name": name,
+                "start": round(started_at, 6),
+                "duration_ms": round((time.perf_counter() - started) * 1000, 3),
+                "thread": threading.current_thread().name,
+            }
+            span.update(attrs)
+            self.record(span)
+
+
+tracer = Tracer(os.getenv("TRACE_FILE", "").strip())
+
+
+def traced(name, describe=None):
+    # describe(result, args) returns extra span fields such as outcome/bytes
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not tracer.enabled:
+                return func(*args, **kwargs)
+            with tracer.span(name) as span:
+                result = func(*args, **kwargs)
+                if describe:
+                    span.update(describe(result, args))
+                return result
+
+        return wrapper
+
+    return decorator
+
+
+class SignalProfiler:
+    def __init__(self, seconds, directory):
+        self.seconds = seconds
+        self.directory = directory
+        self.profile = None
+
+    def install(self):
+        signal.signal(signal.SIGUSR1, self.start)
+        signal.signal(signal.SIGALRM, self.stop)
+
+    def start(self, signum, frame):
+        import cProfile
+
+        if self.profile is not None:
+            return
+        print(f"Profiling for {self.seconds}s...")
+        self.profile = cProfile.Profile()
+        self.profile.enable()
+        signal.setitimer(signal.ITIMER_REAL, self.seconds)
+
+    def stop(self, signum, frame):
+        if self.profile is None:
+            return
+        self.profile.disable()
+        path = os.path.join(
+            self.directory, f"profile-{datetime.now().strftime('%Y%m%d-%H%M%S')}.prof"
+        )
+        self.profile.dump_stats(path)
+        self.profile = None
+        print(f"Profile saved to {path}")
+
+
+class SystemSampler:
+    def __init__(self, process_names, interval=5.0, window=12):
+        self.process_names = set(process_names)
+        self.interval = interval
+        self.samples = deque(maxlen=window)
+        self.processes = {}
+        self.packages = {}
+        self.cpu_times = {}
+        self.latest = None
+        self.current = None
+        self.lock = threading.Lock()
+        self.thread = None
+
+    def watch(self, process_names):
+        with self.lock:
+            self.process_names = set(process_names)
+            self.processes = {}
+            self.packages = {}
+
+    def start(self):
+        if self.thread is None:
+            self.thread = threading.Thread(
+                target=self.run, name="system-sampler", daemon=True
+            )
+            self.thread.start()
+
+    def run(self):
+        while True:
+            try:
+                self.sample()
+            except Exception as e:
+                pass
+            time.sleep(self.interval)
+
+    def find_processes(self):
+        import psutil
+
+        for proc in psutil.process_iter(["pid", "name", "cmdline"]):
+            if proc.pid in self.processes:
+                continue
+            try:
+                cmdline = proc.info["cmdline"] or [""]
+                for name in (proc.info["name"], cmdline[0]):
+                    if name in self.process_names:
+                        # Prime cpu_percent so the next call measures a real interval
+                        proc.cpu_percent(None)
+                        self.processes[proc.pid] = proc
+                        self.packages[proc.pid] = name
+                        break
+            except (psutil.NoSuchProcess, psutil.AccessDenied, IndexError):
+                continue
+
+    def sample_hidden_processes(self):
+        # psutil can't see other apps under hidepid; read the PIDs the
+        # monitors located through the root shell instead
+        now = time.monotonic()
+        clock_ticks = os.sysconf("SC_CLK_TCK")
+        cpu_percent = 0.0
+        rss = 0
+        cpu_times = {}
+        for package in self.process_names:
+            pid = get_process_locator(package).pid
+            stat = read_proc_file(pid, "stat") if pid else None
+            status = read_proc_file(pid, "status") if stat else None
+            if not status:
+                continue
+            fields = parse_proc_stat(stat)
+            cpu_time = (int(fields[11]) + int(fields[12])) / clock_ticks
+            previous = self.cpu_times.get(pid)
+            if previous and now > previous[1]:
+                cpu_percent += 100 * (cpu_time - previous[0]) / (now - previous[1])
+            cpu_times[pid] = (cpu_time, now)
+            for line in status.splitlines():
+                if line.startswith("VmRSS:"):
+                    rss += int(line.split()[1]) * 1024
+        self.cpu_times = cpu_times
+        return cpu_percent, rss
+
+    def sample_processes(self):
+        import psutil
+
+        if proc_reader.is_hidden():
+            return self.sample_hidden_processes()
+
+        # In fleet mode a relaunched client has a new PID while others live on
+        if len(set(self.packages.values())) < len(self.process_names):
+            self.find_processes()
+
+        cpu_percent = 0.0
+        rss = 0
+        for pid, proc in list(self.processes.items()):
+            try:
+                cpu_percent += proc.cpu_percent(None)
+                rss += proc.memory_info().rss
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                del self.processes[pid]
+                del self.packages[pid]
+        return cpu_percent, rss
+
+    def sample(self):
+        # psutil is imported here so it loads on the sampler thread, not at startup
+        import psutil
+
+        # Non-blocking: measures CPU time since the previous sample
+        try:
+            cpu_percent = psutil.cpu_percent(interval=None)
+        except Exception:
+            cpu_percent = 0.0
+        ram = psutil.virtual_memory()
+
+        with self.lock:
+            roblox_cpu, roblox_rss = self.sample_processes()
+            self.samples.append(
+                (cpu_percent, ram.percent, ram.used, roblox_cpu, roblox_rss)
+            )
+            count = len(self.samples)
+            averages = [sum(column) / count for column in zip(*self.samples)]
+            # Unaveraged, for decisions that can't wait a minute to see a spike
+            self.current = {
+                "cpu_percent": cpu_percent,
+                "ram_available_mb": ram.available / (1024**2),
+            }
+
+            self.latest = {
+                "cpu_percent": round(averages[0], 1),
+                "ram_percent": round(averages[1], 1),
+                "ram_used_gb": round(averages[2] / (1024**3), 2),
+                "ram_total_gb": round(ram.total / (1024**3), 2),
+                "roblox_processes": len(self.cpu_times or self.processes),
+                "roblox_cpu_percent": round(averages[3], 1),
+                "roblox_rss_mb": round(averages[4] / (1024**2), 1),
+            }
+
+    def snapshot(self):
+        if self.latest is None:
+            self.sample()
+        return self.latest
+
+
+system_sampler = SystemSampler(
+    [ROBLOX_PACKAGE],
+    float(os.getenv("SYSTEM_SAMPLE_INTERVAL", "5")),
+)
+
+
+class PendingEmbed:
+    def __init__(self, notifier, key, title, description, color, fields, show_user_info):
+        self.notifier = notifier
+        # Queued embeds sharing a key are merged, keeping only the newest
+        self.key = (id(notifier), key) if key else None
+        self.title = title
+        self.description = description
+        self.color = color
+        self.fields = fields
+        self.show_user_info = show_user_info
+        self.timestamp = datetime.now(timezone.utc).isoformat()
+
+
+class WebhookDispatcher:
+    MAX_EMBEDS = 10
+    MAX_RETRIES = 3
+    BATCH_WINDOW = 1.0
+
+    def __init__(self, webhook_url, webhook_name):
+        self.webhook_url = webhook_url
+        self.webhook_name = webhook_name
+        self.max_pending = int(os.getenv("DISCORD_QUEUE_SIZE", "50"))
+        self.pending = []
+        self.cond = threading.Condition()
+        self.session = None
+        self.thread = threading.Thread(
+            target=self.run, name="discord-webhook", daemon=True
+        )
+        self.thread.start()
+
+    def submit(self, item):
+        with self.cond:
+            if item.key:
+                for i, queued in enumerate(self.pending):
+                    if queued.key == item.key:
+                        self.pending[i] = item
+                        return
+            if len(self.pending) >= self.max_pending:
+                self.drop_oldest()
+            self.pending.append(item)
+            self.cond.notify()
+
+    def drop_oldest(self):
+        # Status updates go first, they are superseded by the next one anyway
+        for i, queued in enumerate(self.pending):
+            if queued.key:
+                del self.pending[i]
+                return
+        del self.pending[0]
+
+    def next_batch(self):
+        with self.cond:
+            while not self.pending:
+                self.cond.wait()
+        # Give a burst of notifications time to land in the same message
+        time.sleep(self.BATCH_WINDOW)
+        with self.cond:
+            batch = self.pending[: self.MAX_EMBEDS]
+            del self.pending[: self.MAX_EMBEDS]
+        return batch
+
+    def run(self):
+        import requests
+
+        self.session = requests.Session()
+        while True:
+            batch = self.next_batch()
+            try:
+                self.deliver(batch)
+            except Exception as e:
+                pass
+
+    def retry_after(self, response):
+        try:
+            return float(response.json().get("retry_after", 1.0))
+        except (ValueError, AttributeError):
+            return float(response.headers.get("Retry-After", 1.0))
+
+    def deliver(self, batch):
+        system_info = batch[0].notifier.get_system_info()
+        embeds = [item.notifier.build_embed(item, system_info) for item in batch]
+        payload = {"username": self.webhook_name, "embeds": embeds}
+
+        contents = []
+        for item in batch:
+            content = item.notifier.payload_content()
+            if content and content not in contents:
+                contents.append(content)
+        if contents:
+            payload["content"] = " ".join(contents)
+
+        for _ in range(self.MAX_RETRIES):
+            with tracer.span("discord.post", embeds=len(embeds)) as span:
+                r = self.session.post(self.webhook_url, json=payload, timeout=5)
+                span["status"] = r.status_code
+                span["bytes"] = len(r.request.body or b"")
+                if r.status_code >= 300:
+                    span["outcome"] = "fail"
+            if r.status_code != 429:
+                return r.status_code < 300
+            time.sleep(self.retry_after(r))
+        return False
+
+
+webhook_dispatchers = {}
+webhook_dispatchers_lock = threading.Lock()
+
+
+def get_webhook_dispatcher(webhook_url, webhook_name):
+    with webhook_dispatchers_lock:
+        key = (webhook_url, webhook_name)
+        if key not in webhook_dispatchers:
+            webhook_dispatchers[key] = WebhookDispatcher(webhook_url, webhook_name)
+        return webhook_dispatchers[key]
 
 
 class DiscordNotifier:
+    PROFILE_TIMEOUT = 30.0
+
     def __init__(self, user_id):
+        self.configure()
+        self.dispatcher = None
+        self.user_id = user_id
+        self.username = self.display_name = self.avatar_url = None
+        self.profile_loaded = threading.Event()
+        if self.enabled:
+            # Looked up in the background so a slow API never delays monitoring
+            self.start_profile_load()
+        else:
+            self.profile_loaded.set()
+
+    def configure(self):
         self.webhook_url = os.getenv("DISCORD_WEBHOOK_URL", "")
         self.webhook_name = os.getenv("DISCORD_WEBHOOK_NAME")
         self.mention_user = os.getenv("DISCORD_MENTION_USER", "").strip()
@@ -30,9 +550,30 @@ class DiscordNotifier:
         self.notify_on_error = (
             os.getenv("DISCORD_NOTIFY_ON_ERROR", "true").lower() == "true"
         )
-        self.user_id = user_id
-        self.username, self.display_name = get_user_info(user_id)
-        self.avatar_url = get_user_avatar(user_id) if self.username else None
+
+    def reconfigure(self):
+        was_enabled = self.enabled
+        self.configure()
+        # The dispatcher is per webhook URL, pick it up again on the next send
+        self.dispatcher = None
+        if self.enabled and not was_enabled and self.username is None:
+            self.start_profile_load()
+
+    def start_profile_load(self):
+        self.profile_loaded.clear()
+        threading.Thread(
+            target=self.load_profile, name="discord-profile", daemon=True
+        ).start()
+
+    def load_profile(self):
+        try:
+            self.username, self.display_name = get_user_info(self.user_id)
+            if self.username:
+                self.avatar_url = get_user_avatar(self.user_id)
+        except Exception as e:
+            pass
+        finally:
+            self.profile_loaded.set()
 
     def format_mention(self):
         if not self.mention_user:
@@ -47,23 +588,7 @@ class DiscordNotifier:
 
     def get_system_info(self):
         try:
-            # cpu_percent can fail on Android/Termux
-            try:
-                cpu_percent = psutil.cpu_percent(interval=0.5)
-            except Exception:
-                cpu_percent = 0.0
-            
-            ram = psutil.virtual_memory()
-            ram_percent = ram.percent
-            ram_used_gb = ram.used / (1024**3)
-            ram_total_gb = ram.total / (1024**3)
-
-            return {
-                "cpu_percent": cpu_percent,
-                "ram_percent": ram_percent,
-                "ram_used_gb": round(ram_used_gb, 2),
-                "ram_total_gb": round(ram_total_gb, 2),
-            }
+            return system_sampler.snapshot()
         except Exception as e:
             print(f"Warning: Failed to get system info: {e}")
             return {
@@ -71,12 +596,39 @@ class DiscordNotifier:
                 "ram_percent": 0.0,
                 "ram_used_gb": 0.0,
                 "ram_total_gb": 0.0,
+                "roblox_processes": 0,
+                "roblox_cpu_percent": 0.0,
+                "roblox_rss_mb": 0.0,
             }
 
-    def send_embed(self, title, description, color, fields=None, show_user_info=True):
+    @traced("discord.send_embed")
+    def send_embed(
+        self, title, description, color, fields=None, show_user_info=True, key=None
+    ):
         if not self.enabled:
             return False
 
+        if self.dispatcher is None:
+            self.dispatcher = get_webhook_dispatcher(
+                self.webhook_url, self.webhook_name
+            )
+        self.dispatcher.submit(
+            PendingEmbed(self, key, title, description, color, fields, show_user_info)
+        )
+        return True
+
+    def payload_content(self):
+        return None
+
+    def build_embed(self, item, system_info):
+        title = item.title
+        description = item.description
+        color = item.color
+        fields = item.fields
+        show_user_info = item.show_user_info
+        # Runs on the webhook thread, so waiting here only delays the message
+        self.profile_loaded.wait(self.PROFILE_TIMEOUT)
+
         content_lines = []
 
         if description:
@@ -92,13 +644,13 @@ class DiscordNotifier:
         content_lines.append("──────────────────────────────")
         content_lines.append("")
 
-        system_info = self.get_system_info()
-        
         if self.display_name:
              content_lines.append(f"• **Account Name:** {self.display_name}")
         
         content_lines.append(f"• **CPU Usage:** {system_info['cpu_percent']}%")
         content_lines.append(f"• **RAM Usage:** {system_info['ram_used_gb']}/{system_info['ram_total_gb']} GB ({system_info['ram_percent']}%)")
+        if system_info["roblox_processes"]:
+            content_lines.append(f"• **Roblox Usage:** {system_info['roblox_cpu_percent']}% CPU, {system_info['roblox_rss_mb']} MB RAM")
 
         mention = self.format_mention()
         if mention:
@@ -110,7 +662,7 @@ class DiscordNotifier:
             "title": f"**{title}**", # Bold title for impact
             "description": final_description,
             "color": color,
-            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "timestamp": item.timestamp,
             "footer": {"text": self.webhook_name},
             #"fields": [] # explicitly empty, we moved everything to description
             "thumbnail": {"url": "https://tr.rbxcdn.com/53eb9b17fe1432a809c73a1ca3434645/150/150/Image/Png"} # Re-adding thumbnail as it looks good in the example
@@ -122,13 +674,7 @@ class DiscordNotifier:
                 "icon_url": self.avatar_url,
             }
 
-        payload = {"username": self.webhook_name, "embeds": [embed]}
-
-        try:
-            requests.post(self.webhook_url, json=payload, timeout=5)
-            return True
-        except:
-            return False
+        return embed
 
     def notify_start(self, user_id, check_interval):
         if not self.notify_on_start:
@@ -166,7 +712,7 @@ class DiscordNotifier:
         description = "" 
         
         if universe_id:
-             game_name = get_game_name(universe_id)
+             game_name = get_game_name(universe_id, retry=False)
              if game_name:
                  title = f"[ {status} ] - {game_name}"
 
@@ -175,14 +721,14 @@ class DiscordNotifier:
              clean_fields.append({"name": "Game ID", "value": f"`{game_id}`"})
         
         if universe_id and " - " not in title:
-             game_name = get_game_name(universe_id)
+             game_name = get_game_name(universe_id, retry=False)
              if game_name:
                  clean_fields.append({"name": "Game Name", "value": game_name})
 
         # Define color based on status
         color = 5025616 if status == "In-Game" else 16776960
 
-        self.send_embed(title, description, color, clean_fields)
+        self.send_embed(title, description, color, clean_fields, key="status")
 
     def notify_error(self, error):
         if not self.notify_on_error:
@@ -190,22 +736,130 @@ class DiscordNotifier:
         self.send_embed("Error Occurred", f"```{error}```", 16711680)
 
 
+class RootShell:
+    def __init__(self):
+        self.proc = None
+        self.counter = 0
+        self.lock = threading.Lock()
+
+    def spawn(self):
+        self.proc = subprocess.Popen(
+            ["su"],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            bufsize=0,
+        )
+
+    def close(self):
+        if self.proc is not None:
+            try:
+                self.proc.kill()
+                self.proc.wait(timeout=1)
+            except Exception:
+                pass
+            self.proc = None
+
+    def read_until(self, marker, timeout):
+        deadline = time.monotonic() + timeout
+        buffers = {self.proc.stdout.fileno(): b"", self.proc.stderr.fileno(): b""}
+        pending = set(buffers)
+
+        while pending:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError("Command timed out")
+            readable, _, _ = select.select(list(pending), [], [], remaining)
+            for fd in readable:
+                chunk = os.read(fd, 65536)
+                if not chunk:
+                    raise EOFError("Root shell exited")
+                buffers[fd] += chunk
+                if marker in buffers[fd]:
+                    pending.discard(fd)
+
+        return buffers[self.proc.stdout.fileno()], buffers[self.proc.stderr.fileno()]
+
+    def run(self, cmd_str, timeout=10):
+        started = time.monotonic()
+        try:
+            return self.execute(cmd_str, timeout)
+        finally:
+            metrics.observe(
+                "auto_rejoin_shell_command_seconds",
+                time.monotonic() - started,
+                command=cmd_str.split()[0],
+            )
+
+    def execute(self, cmd_str, timeout):
+        with self.lock:
+            self.counter += 1
+            marker = f"__AUTO_REJOIN_{os.getpid()}_{self.counter}__"
+            # stdin is redirected so a command can never swallow the next one
+            script = (
+                f"{{ {cmd_str}\n}} </dev/null\n"
+                f"__rc=$?\n"
+                f'echo ""; echo "{marker} $__rc"\n'
+                f'echo "" >&2; echo "{marker}" >&2\n'
+            ).encode()
+
+            for attempt in range(2):
+                if self.proc is None or self.proc.poll() is not None:
+                    self.spawn()
+                try:
+                    self.proc.stdin.write(script)
+                    break
+                except OSError:
+                    # Shell died between commands, nothing ran yet so retry once
+                    self.close()
+            else:
+                return False, "Failed to start root shell"
+
+            try:
+                stdout, stderr = self.read_until(marker.encode(), timeout)
+            except (TimeoutError, EOFError, OSError) as e:
+                self.close()
+                return False, str(e)
+
+            stdout = stdout.decode(errors="replace")
+            stderr = stderr.decode(errors="replace")
+            output, _, status = stdout.rpartition(f"\n{marker} ")
+            error = stderr.rpartition(f"\n{marker}")[0]
+
+            if status.strip() == "0":
+                return True, output.strip()
+            return False, error.strip()
+
+
+root_shell = RootShell()
+atexit.register(root_shell.close)
+
+
 def check_root():
+    # Uses the persistent root shell so the check doesn't cost a separate su
     try:
-        result = subprocess.run(["su", "-c", "id"], capture_output=True, timeout=5)
-        return result.returncode == 0
+        success, _ = root_shell.run("id", timeout=5)
+        return success
     except:
         return False
 
 
-def run_shell_cmd(cmd_str, use_root=False, silent=False):
+@traced(
+    "shell",
+    lambda result, args: {
+        "command": args[0].split()[0],
+        "outcome": "ok" if result[0] else "fail",
+        "bytes": len(result[1]),
+    },
+)
+def run_shell_cmd(cmd_str, use_root=False, silent=False, timeout=10):
     if use_root:
-        full_cmd = ["su", "-c", cmd_str]
-    else:
-        full_cmd = cmd_str.split()
+        return root_shell.run(cmd_str, timeout)
 
     try:
-        result = subprocess.run(full_cmd, capture_output=True, text=True, timeout=10)
+        result = subprocess.run(
+            cmd_str.split(), capture_output=True, text=True, timeout=timeout
+        )
 
         if result.returncode == 0:
             return True, result.stdout.strip()
@@ -215,125 +869,799 @@ def run_shell_cmd(cmd_str, use_root=False, silent=False):
         return False, str(e)
 
 
-def get_roblox_pid():
-    success, output = run_shell_cmd(
-        f"pidof {ROBLOX_PACKAGE}", use_root=True, silent=True
-    )
-    if success and output:
-        return output.split()[0]
-    return None
+class ProcReader:
+    def __init__(self):
+        self.hidden = None
 
+    def detect_hidden(self):
+        # Android 7+ mounts /proc with hidepid=2: other apps' /proc/<pid> then
+        # looks missing (ENOENT), not forbidden, to anyone but root
+        if os.geteuid() == 0:
+            return False
+        try:
+            with open("/proc/mounts") as f:
+                mounts = f.read()
+        except OSError:
+            return False
+        for line in mounts.splitlines():
+            fields = line.split()
+            if len(fields) < 4 or fields[1] != "/proc":
+                continue
+            for option in fields[3].split(","):
+                name, _, value = option.partition("=")
+                if name == "hidepid" and value not in ("0", "off"):
+                    return True
+        return False
+
+    def is_hidden(self):
+        if self.hidden is None:
+            self.hidden = self.detect_hidden()
+        return self.hidden
+
+    def read_as_root(self, pid, name):
+        success, output = run_shell_cmd(
+            f"cat /proc/{pid}/{name}", use_root=True, silent=True
+        )
+        return output if success else None
+
+    def read(self, pid, name):
+        if self.is_hidden():
+            return self.read_as_root(pid, name)
+        try:
+            with open(f"/proc/{pid}/{name}", "rb") as f:
+                return f.read().decode(errors="replace")
+        except (FileNotFoundError, ProcessLookupError):
+            return None
+        except PermissionError:
+            return self.read_as_root(pid, name)
+
+    def check_hidden(self, pid):
+        # pidof just reported pid, so if only root can read its stat, /proc is
+        # hidden in a way /proc/mounts did not show
+        if self.is_hidden() or not self.read_as_root(pid, "stat"):
+            return False
+        self.hidden = True
+        return True
+
+
+proc_reader = ProcReader()
 
-def force_stop_roblox():
-    pid = get_roblox_pid()
+
+def read_proc_file(pid, name):
+    return proc_reader.read(pid, name)
+
+
+def parse_proc_stat(stat):
+    # comm (field 2) may contain spaces, so split after its closing paren
+    return stat[stat.rindex(")") + 2 :].split()
+
+
+class ProcessLocator:
+    def __init__(self, package):
+        self.package = package
+        self.pid = None
+        self.start_time = None
+
+    def read_start_time(self, pid):
+        stat = read_proc_file(pid, "stat")
+        if not stat:
+            return None
+        fields = parse_proc_stat(stat)
+        if fields[0] in ("Z", "X"):
+            return None
+        return fields[19]
+
+    def is_package(self, pid):
+        cmdline = read_proc_file(pid, "cmdline")
+        return bool(cmdline) and cmdline.split("\0")[0].strip() == self.package
+
+    def is_alive(self):
+        return (
+            self.pid is not None
+            and self.read_start_time(self.pid) == self.start_time
+            and self.is_package(self.pid)
+        )
+
+    def scan(self):
+        success, output = run_shell_cmd(
+            f"pidof {self.package}", use_root=True, silent=True
+        )
+        if success and output:
+            pid = output.split()[0]
+            start_time = self.read_start_time(pid)
+            if start_time is None and proc_reader.check_hidden(pid):
+                start_time = self.read_start_time(pid)
+            if start_time:
+                return pid, start_time
+        return None, None
+
+    def locate(self):
+        if not self.is_alive():
+            # Full scan only once the remembered PID is gone or was reused
+            self.pid, self.start_time = self.scan()
+        return self.pid
+
+
+process_locators = {}
+
+
+def get_process_locator(package=ROBLOX_PACKAGE):
+    if package not in process_locators:
+        process_locators[package] = ProcessLocator(package)
+    return process_locators[package]
+
+
+class HangDetector:
+    def __init__(self, timeout):
+        self.timeout = timeout
+        self.pid = None
+        self.cpu_time = None
+        self.progress_at = None
+
+    def sample(self, pid):
+        now = time.monotonic()
+        if pid != self.pid:
+            self.pid = pid
+            self.cpu_time = None
+            self.progress_at = now
+        if pid is None:
+            return False
+
+        stat = read_proc_file(pid, "stat")
+        if not stat:
+            return False
+        fields = parse_proc_stat(stat)
+        # utime + stime of all threads; a main thread stuck in uninterruptible
+        # sleep (D) is not progress even if other threads still burn CPU
+        cpu_time = int(fields[11]) + int(fields[12])
+        if cpu_time != self.cpu_time and fields[0] != "D":
+            self.progress_at = now
+        self.cpu_time = cpu_time
+        return now - self.progress_at >= self.timeout
+
+
+class MemoryWatchdog:
+    # Growth is only projected once it has been watched for a while; loading
+    # a game grows memory quickly and then levels off
+    MIN_SAMPLES = 10
+    MIN_SPAN = 600.0
+
+    def __init__(self, limit_mb, oom_horizon, window=120):
+        self.limit_mb = limit_mb
+        self.oom_horizon = oom_horizon
+        self.pid = None
+        self.samples = deque(maxlen=window)
+
+    def read_usage_mb(self, pid):
+        # PSS splits shared pages fairly between clients; VmRSS as a fallback
+        rollup = read_proc_file(pid, "smaps_rollup")
+        for line in (rollup or "").splitlines():
+            if line.startswith("Pss:"):
+                return int(line.split()[1]) / 1024
+        status = read_proc_file(pid, "status")
+        for line in (status or "").splitlines():
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+        return None
+
+    def sample(self, pid):
+        if pid != self.pid:
+            self.pid = pid
+            self.samples.clear()
+        if pid is None:
+            return None
+        usage = self.read_usage_mb(pid)
+        if usage is not None:
+            self.samples.append((time.monotonic(), usage))
+        return usage
+
+    def growth_rate(self):
+        # Least-squares slope in MB/s
+        count = len(self.samples)
+        if count < self.MIN_SAMPLES:
+            return None
+        if self.samples[-1][0] - self.samples[0][0] < self.MIN_SPAN:
+            return None
+        mean_t = sum(t for t, _ in self.samples) / count
+        mean_mb = sum(mb for _, mb in self.samples) / count
+        variance = sum((t - mean_t) ** 2 for t, _ in self.samples)
+        if not variance:
+            return None
+        covariance = sum((t - mean_t) * (mb - mean_mb) for t, mb in self.samples)
+        return covariance / variance
+
+    def restart_reason(self):
+        if not self.samples:
+            return None
+        usage = self.samples[-1][1]
+        if self.limit_mb and usage >= self.limit_mb:
+            return f"{usage:.0f} MB, over the {self.limit_mb} MB limit"
+
+        rate = self.growth_rate()
+        current = system_sampler.current
+        if self.oom_horizon and rate and rate > 0 and current:
+            seconds = current["ram_available_mb"] / rate
+            if seconds <= self.oom_horizon:
+                return (
+                    f"{usage:.0f} MB, growing {rate * 60:.1f} MB/min, "
+                    f"out of memory in about {seconds / 60:.0f} min"
+                )
+        return None
+
+
+class NetworkActivity:
+    DNS_PORT = "0035"
+
+    def __init__(self, idle_timeout):
+        self.idle_timeout = idle_timeout
+        self.pid = None
+        self.traffic = None
+        self.active_at = None
+
+    def read_uid(self, pid):
+        status = read_proc_file(pid, "status")
+        for line in (status or "").splitlines():
+            if line.startswith("Uid:"):
+                return line.split()[1]
+        return None
+
+    def count_udp_sockets(self, pid, uid):
+        tables = [read_proc_file(pid, "net/udp"), read_proc_file(pid, "net/udp6")]
+        if not any(tables):
+            return None
+        count = 0
+        for table in tables:
+            for line in (table or "").splitlines()[1:]:
+                fields = line.split()
+                # Short-lived DNS lookups are not game traffic
+                if len(fields) > 7 and fields[7] == uid:
+                    if fields[2].rsplit(":", 1)[-1] != self.DNS_PORT:
+                        count += 1
+        return count
+
+    def read_traffic(self, pid, uid):
+        # Per-UID byte counters, only on kernels with xt_qtaguid (Android 9 and
+        # older). /proc/<pid>/io is no substitute: sendto/recvfrom never count
+        stats = read_proc_file(pid, "net/xt_qtaguid/stats")
+        if not stats:
+            return None
+        total = 0
+        for line in stats.splitlines()[1:]:
+            fields = line.split()
+            if len(fields) > 7 and fields[2] == "0x0" and fields[3] == uid:
+                total += int(fields[5]) + int(fields[7])
+        return total
+
+    def sample(self, pid):
+        now = time.monotonic()
+        if pid != self.pid:
+            # A new client gets a full idle_timeout before it can look idle
+            self.pid = pid
+            self.traffic = None
+            self.active_at = now
+        if pid is None:
+            return None
+
+        uid = self.read_uid(pid)
+        if uid is None:
+            return None
+        sockets = self.count_udp_sockets(pid, uid)
+        traffic = self.read_traffic(pid, uid)
+        if sockets is None and traffic is None:
+            return None
+
+        moved = traffic is None or self.traffic is None or traffic != self.traffic
+        self.traffic = traffic
+        if moved and (sockets is None or sockets > 0):
+            self.active_at = now
+        return not self.idle()
+
+    def idle(self):
+        return (
+            self.active_at is not None
+            and time.monotonic() - self.active_at >= self.idle_timeout
+        )
+
+    def reset(self):
+        self.active_at = time.monotonic()
+
+
+def get_roblox_pid(package=ROBLOX_PACKAGE):
+    return get_process_locator(package).locate()
+
+
+def force_stop_roblox(package=ROBLOX_PACKAGE):
+    pid = get_roblox_pid(package)
     if pid:
         run_shell_cmd(f"kill -9 {pid}", use_root=True, silent=True)
         time.sleep(1)
 
-    run_shell_cmd(f"am force-stop {ROBLOX_PACKAGE}", use_root=True, silent=True)
-    time.sleep(1)
+    run_shell_cmd(f"am force-stop {package}", use_root=True, silent=True)
+    if pid:
+        time.sleep(1)
+    return pid is not None
 
 
-def open_ps_link(link):
-    cmd = f'am start -a android.intent.action.VIEW -d "{link}" -p {ROBLOX_PACKAGE}'
+def open_ps_link(link, package=ROBLOX_PACKAGE):
+    cmd = f'am start -a android.intent.action.VIEW -d "{link}" -p {package}'
     success, _ = run_shell_cmd(cmd, use_root=True, silent=True)
     return success
 
 
-def is_roblox_running():
-    return get_roblox_pid() is not None
+def is_roblox_running(package=ROBLOX_PACKAGE):
+    return get_roblox_pid(package) is not None
+
+
+class TokenBucket:
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.lock = threading.Lock()
+
+    def acquire(self, wait_blocked=True):
+        # Returns False instead of waiting out a Retry-After block if asked to
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                if not wait_blocked and now < self.blocked_until:
+                    return False
+                self.tokens = min(
+                    self.capacity, self.tokens + (now - self.updated) * self.rate
+                )
+                self.updated = now
+                if now >= self.blocked_until and self.tokens >= 1:
+                    self.tokens -= 1
+                    return True
+                wait = max(self.blocked_until - now, (1 - self.tokens) / self.rate)
+            time.sleep(wait)
+
+    def block(self, seconds):
+        with self.lock:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+
+class RobloxAPI:
+    USER_AGENT = "Mozilla/5.0"
+    MAX_RETRIES = 3
+    MAX_BACKOFF = 60.0
+
+    def __init__(self):
+        # Points every Roblox host at one local server (used by bench/)
+        self.base_url = os.getenv("ROBLOX_API_BASE_URL", "").rstrip("/")
+        self.rate = float(os.getenv("ROBLOX_API_RATE", "5"))
+        self.burst = int(os.getenv("ROBLOX_API_BURST", "10"))
+        self.buckets = {}
+        self.lock = threading.Lock()
+        self.session = None
+
+    def connect(self):
+        # requests takes a noticeable time to import on phones, so it is
+        # loaded by the first call instead of at startup
+        with self.lock:
+            if self.session is not None:
+                return self.session
+            import http.cookiejar
+            import requests
+            import requests.adapters
+
+            session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(pool_connections=8, pool_maxsize=8)
+            session.mount("https://", adapter)
+            session.headers.update(
+                {"User-Agent": self.USER_AGENT, "Accept": "application/json"}
+            )
+            # Cookies are passed per request; never let a response cookie leak
+            # into requests made for another account
+            session.cookies.set_policy(
+                http.cookiejar.DefaultCookiePolicy(allowed_domains=[])
+            )
+            self.session = session
+            return session
+
+    def bucket(self, host):
+        with self.lock:
+            if host not in self.buckets:
+                self.buckets[host] = TokenBucket(self.rate, self.burst)
+            return self.buckets[host]
+
+    def retry_delay(self, response, attempt):
+        retry_after = response.headers.get("Retry-After")
+        if retry_after:
+            try:
+                return min(float(retry_after), self.MAX_BACKOFF)
+            except ValueError:
+                try:
+                    retry_at = parsedate_to_datetime(retry_after)
+                    delay = (retry_at - datetime.now(timezone.utc)).total_seconds()
+                    return min(max(delay, 0.0), self.MAX_BACKOFF)
+                except (TypeError, ValueError):
+                    pass
+        return min(2**attempt + random.random(), self.MAX_BACKOFF)
+
+    def resolve(self, url):
+        if not self.base_url:
+            return url
+        parts = urlsplit(url)
+        return f"{self.base_url}/{parts.netloc.split('.')[0]}{parts.path}"
+
+    def request(self, method, url, retry=True, **kwargs):
+        # retry=False fails fast for callers that must not stall (presence):
+        # one attempt, and None while the host is blocked by a 429
+        kwargs.setdefault("timeout", 10)
+        session = self.session or self.connect()
+        url = self.resolve(url)
+        bucket = self.bucket(urlsplit(url).netloc)
+        attempts = self.MAX_RETRIES + 1 if retry else 1
+
+        for attempt in range(attempts):
+            if not bucket.acquire(wait_blocked=retry):
+                return None
+            with tracer.span(
+                "http", method=method, host=urlsplit(url).netloc, attempt=attempt
+            ) as span:
+                response = session.request(method, url, **kwargs)
+                span["status"] = response.status_code
+                span["bytes"] = len(response.content)
+                if response.status_code >= 400:
+                    span["outcome"] = "fail"
+            if response.status_code != 429 and response.status_code < 500:
+                return response
+            delay = self.retry_delay(response, attempt)
+            if response.status_code == 429:
+                # Throttling applies to the whole host, not just this call
+                bucket.block(delay)
+            if attempt == attempts - 1:
+                break
+            if response.status_code != 429:
+                time.sleep(delay)
+
+        return response
+
+    def get_json(self, url, **kwargs):
+        r = self.request("GET", url, **kwargs)
+        if r is not None and r.status_code == 200:
+            return r.json()
+        return None
+
+    def post_json(self, url, **kwargs):
+        r = self.request("POST", url, **kwargs)
+        if r is not None and r.status_code == 200:
+            return r.json()
+        return None
+
+
+roblox_api = RobloxAPI()
+
+
+class TTLCache:
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        key = str(key)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.time():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        key = str(key)
+        with self.lock:
+            self.entries[key] = (time.time() + self.ttl, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def dump(self):
+        now = time.time()
+        with self.lock:
+            return [
+                [key, expires_at, value]
+                for key, (expires_at, value) in self.entries.items()
+                if expires_at > now
+            ]
+
+    def restore(self, items):
+        now = time.time()
+        with self.lock:
+            for key, expires_at, value in items:
+                if expires_at > now:
+                    self.entries[str(key)] = (expires_at, value)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+
+class MetadataCache:
+    def __init__(self, path, ttl, max_size=512):
+        self.path = path
+        self.games = TTLCache(max_size, ttl)
+        self.users = TTLCache(max_size, ttl)
+        self.avatars = TTLCache(max_size, ttl)
+        self.lock = threading.Lock()
+
+    def tables(self):
+        return {"games": self.games, "users": self.users, "avatars": self.avatars}
+
+    def load(self):
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+            for name, table in self.tables().items():
+                table.restore(data.get(name, []))
+        except (OSError, ValueError, TypeError):
+            pass
+
+    def save(self):
+        data = {name: table.dump() for name, table in self.tables().items()}
+        tmp_path = f"{self.path}.tmp"
+        with self.lock:
+            try:
+                with open(tmp_path, "w") as f:
+                    json.dump(data, f)
+                os.replace(tmp_path, self.path)
+            except OSError:
+                pass
+
+
+metadata_cache = MetadataCache(
+    os.getenv("METADATA_CACHE_FILE", ".metadata_cache.json"),
+    int(os.getenv("METADATA_CACHE_TTL", "86400")),
+)
+metadata_cache.load()
+
+
+class PendingLookup:
+    def __init__(self):
+        self.value = None
+        self.done = threading.Event()
+
+
+class BatchResolver:
+    # Lookups arriving within this window share one request
+    WINDOW = 0.1
+
+    def __init__(self, fetch, batch_size):
+        self.fetch = fetch
+        self.batch_size = batch_size
+        self.lookups = {}
+        self.queue = []
+        self.collecting = False
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        return self.get_many([key], self.WINDOW).get(key)
+
+    def get_many(self, keys, window=0):
+        with self.lock:
+            lookups = {}
+            for key in keys:
+                # A key already queued or in flight is shared, not fetched twice
+                if key not in self.lookups:
+                    self.lookups[key] = PendingLookup()
+                    self.queue.append(key)
+                lookups[key] = self.lookups[key]
+            leader = not self.collecting
+            self.collecting = True
+
+        if leader:
+            if window:
+                time.sleep(window)
+            self.flush()
+
+        for lookup in lookups.values():
+            lookup.done.wait()
+        return {key: lookup.value for key, lookup in lookups.items()}
+
+    def flush(self):
+        with self.lock:
+            keys, self.queue = self.queue, []
+            self.collecting = False
+
+        for i in range(0, len(keys), self.batch_size):
+            batch = keys[i : i + self.batch_size]
+            try:
+                results = self.fetch(batch)
+            except Exception as e:
+                results = {}
+            with self.lock:
+                for key in batch:
+                    lookup = self.lookups.pop(key)
+                    lookup.value = results.get(key)
+                    lookup.done.set()
+
 
+def describe_lookup(result, args):
+    return {"outcome": "ok" if result and any(result) else "miss"}
 
+
+@traced("api.get_user_info", describe_lookup)
 def get_user_info(user_id):
-    url = f"https://users.roblox.com/v1/users/{user_id}"
-    headers = {"User-Agent": "Mozilla/5.0"}
+    cached = metadata_cache.users.get(user_id)
+    if cached:
+        return tuple(cached)
 
     try:
-        r = requests.get(url, headers=headers, timeout=10)
-        if r.status_code == 200:
-            data = r.json()
-            return data.get("name"), data.get("displayName")
+        data = roblox_api.get_json(f"https://users.roblox.com/v1/users/{user_id}")
+        if data:
+            user_info = (data.get("name"), data.get("displayName"))
+            metadata_cache.users.set(user_id, list(user_info))
+            metadata_cache.save()
+            return user_info
     except Exception as e:
         pass
 
     return None, None
 
 
-def get_user_avatar(user_id):
+@traced("api.fetch_avatars", lambda result, args: {"users": len(args[0])})
+def fetch_avatars(user_ids):
     url = "https://thumbnails.roblox.com/v1/users/avatar-headshot"
     params = {
-        "userIds": user_id,
+        "userIds": ",".join(user_ids),
         "size": "150x150",
         "format": "Png",
         "isCircular": True,
     }
-    headers = {"User-Agent": "Mozilla/5.0", "Accept": "application/json"}
 
-    try:
-        r = requests.get(url, params=params, headers=headers, timeout=10)
-        if r.status_code == 200:
-            data = r.json()
-            images = data.get("data", [])
-            if images:
-                return images[0].get("imageUrl")
-    except Exception as e:
-        pass
+    avatars = {}
+    data = roblox_api.get_json(url, params=params)
+    for image in (data or {}).get("data", []):
+        if image.get("imageUrl"):
+            avatars[str(image.get("targetId"))] = image["imageUrl"]
+    for user_id, avatar_url in avatars.items():
+        metadata_cache.avatars.set(user_id, avatar_url)
+    if avatars:
+        metadata_cache.save()
+    return avatars
 
-    return None
 
-
-def get_game_name(universe_id):
+@traced("api.fetch_game_names", lambda result, args: {"games": len(args[0])})
+def fetch_game_names(universe_ids, retry=True):
     url = "https://games.roblox.com/v1/games"
-    params = {"universeIds": universe_id}
-    headers = {"User-Agent": "Mozilla/5.0", "Accept": "application/json"}
+    params = {"universeIds": ",".join(universe_ids)}
 
-    try:
-        r = requests.get(url, params=params, headers=headers, timeout=10)
-        if r.status_code == 200:
-            data = r.json()
-            games = data.get("data", [])
-            if games:
-                return games[0].get("name")
-    except Exception as e:
-        pass
+    names = {}
+    data = roblox_api.get_json(url, retry=retry, params=params)
+    for game in (data or {}).get("data", []):
+        if game.get("name"):
+            names[str(game.get("id"))] = game["name"]
+    for universe_id, game_name in names.items():
+        metadata_cache.games.set(universe_id, game_name)
+    if names:
+        metadata_cache.save()
+    return names
 
-    return None
 
+avatar_resolver = BatchResolver(fetch_avatars, 100)
+game_name_resolver = BatchResolver(fetch_game_names, 50)
 
-def check_user_presence(user_id, roblox_cookie=None):
+
+@traced("api.get_user_avatar", describe_lookup)
+def get_user_avatar(user_id):
+    user_id = str(user_id)
+    cached = metadata_cache.avatars.get(user_id)
+    if cached:
+        return cached
+    return avatar_resolver.get(user_id)
+
+
+@traced("api.get_game_name", describe_lookup)
+def get_game_name(universe_id, retry=True):
+    if not universe_id:
+        return None
+
+    universe_id = str(universe_id)
+    cached = metadata_cache.games.get(universe_id)
+    if cached:
+        return cached
+    if not retry:
+        return get_game_names([universe_id], retry=False).get(universe_id)
+    return game_name_resolver.get(universe_id)
+
+
+def get_game_names(universe_ids, retry=True):
+    # retry=False is for the monitoring path: one attempt, no Retry-After wait
+    names = {}
+    missing = []
+    for universe_id in {str(u) for u in universe_ids if u}:
+        cached = metadata_cache.games.get(universe_id)
+        if cached:
+            names[universe_id] = cached
+        else:
+            missing.append(universe_id)
+    if missing and retry:
+        names.update(game_name_resolver.get_many(missing))
+    elif missing:
+        for i in range(0, len(missing), 50):
+            try:
+                names.update(fetch_game_names(missing[i : i + 50], retry=False))
+            except Exception:
+                pass
+    return names
+
+
+@traced("api.check_users_presence", lambda result, args: {"users": len(result)})
+def check_users_presence(user_ids, roblox_cookie=None):
     url = "https://presence.roblox.com/v1/presence/users"
-    payload = {"userIds": [user_id]}
-    headers = {"Content-Type": "application/json", "User-Agent": "Mozilla/5.0"}
 
     cookies = {}
     if roblox_cookie:
         cookies[".ROBLOSECURITY"] = roblox_cookie
 
-    try:
-        r = requests.post(
-            url, json=payload, headers=headers, cookies=cookies, timeout=10
-        )
-        if r.status_code == 200:
-            data = r.json()
-            user_presences = data.get("userPresences", [])
-            if user_presences:
-                presence = user_presences[0]
-                presence_type = presence.get("userPresenceType")
-                game_id = presence.get("gameId")
-                universe_id = presence.get("universeId")
-                is_ingame = presence_type == 2
-                return is_ingame, game_id, universe_id
-    except Exception as e:
-        pass
+    user_ids = [str(user_id) for user_id in user_ids]
+    # API failures keep the old "assume in-game" behaviour for every user
+    presences = {user_id: (True, None, None) for user_id in user_ids}
 
-    return True, None, None
+    for i in range(0, len(user_ids), PRESENCE_BATCH_SIZE):
+        chunk = user_ids[i : i + PRESENCE_BATCH_SIZE]
+        payload = {"userIds": chunk}
+        started = time.monotonic()
+        try:
+            try:
+                # A stalled presence call would hold up crash handling for
+                # every account, so a throttled host just skips this check
+                data = roblox_api.post_json(
+                    url, retry=False, json=payload, cookies=cookies
+                )
+            finally:
+                metrics.observe(
+                    "auto_rejoin_presence_api_seconds", time.monotonic() - started
+                )
+            if data:
+                for presence in data.get("userPresences", []):
+                    presence_type = presence.get("userPresenceType")
+                    game_id = presence.get("gameId")
+                    universe_id = presence.get("universeId")
+                    is_ingame = presence_type == 2
+                    presences[str(presence.get("userId"))] = (
+                        is_ingame,
+                        game_id,
+                        universe_id,
+                    )
+        except Exception as e:
+            pass
+
+    return presences
+
+
+def poll_presence(monitors):
+    # One request per cookie; accounts without their own cookie share ROBLOX_COOKIE
+    groups = {}
+    for monitor in monitors:
+        groups.setdefault(monitor.account.roblox_cookie, []).append(monitor)
+
+    presences = {}
+    for roblox_cookie, group in groups.items():
+        user_ids = [monitor.account.user_id for monitor in group]
+        presences.update(check_users_presence(user_ids, roblox_cookie))
+    return presences
 
 
-def should_rejoin(user_id, expected_game_id, roblox_cookie=None):
-    if not is_roblox_running():
+def check_user_presence(user_id, roblox_cookie=None):
+    return check_users_presence([user_id], roblox_cookie)[str(user_id)]
+
+
+def should_rejoin(
+    user_id, expected_game_id, roblox_cookie=None, package=ROBLOX_PACKAGE, presence=None
+):
+    if not is_roblox_running(package):
         return True, "Process stopped", None, None
 
-    is_ingame, current_game_id, universe_id = check_user_presence(user_id, roblox_cookie)
+    if presence is None:
+        presence = check_user_presence(user_id, roblox_cookie)
+    is_ingame, current_game_id, universe_id = presence
 
     if not is_ingame:
         return True, "Not in-game", current_game_id, universe_id
@@ -350,128 +1678,1440 @@ def set_selinux_permissive():
         run_shell_cmd("setenforce 0", use_root=True, silent=True)
 
 
+def preflight(result):
+    result["root"] = check_root()
+    if result["root"]:
+        set_selinux_permissive()
+
+
 def print_header():
     print("\n" + "-" * 50)
     print("  Auto Rejoin Roblox Private Server")
     print("-" * 50 + "\n")
 
 
-def main():
-    if not os.path.exists(".env"):
-        print("Error: .env file not found")
-        print("Run: python setup.py")
-        return
 
-    if not check_root():
-        print("Error: Root access required")
-        return
 
-    set_selinux_permissive()
+class Account:
+    def __init__(
+        self,
+        user_id,
+        ps_link,
+        package=ROBLOX_PACKAGE,
+        roblox_cookie=None,
+        name=None,
+        priority=0,
+    ):
+        self.user_id = str(user_id)
+        self.ps_link = ps_link
+        self.package = package
+        self.roblox_cookie = roblox_cookie
+        self.name = name or self.user_id
+        self.priority = priority
+
+
+def load_accounts(roblox_cookie=None, env=os.environ):
+    fleet_file = env.get("FLEET_FILE", "").strip()
+    if not fleet_file:
+        return [Account(env.get("USER_ID"), env.get("PS_LINK"), roblox_cookie=roblox_cookie)]
+
+    with open(fleet_file) as f:
+        entries = json.load(f)
+
+    accounts = []
+    for entry in entries:
+        accounts.append(
+            Account(
+                entry["user_id"],
+                entry["ps_link"],
+                entry.get("package", ROBLOX_PACKAGE),
+                entry.get("roblox_cookie") or roblox_cookie,
+                entry.get("name"),
+                int(entry.get("priority", 0)),
+            )
+        )
+    return accounts
 
-    ps_link = os.getenv("PS_LINK")
-    user_id = os.getenv("USER_ID")
-    interval = int(os.getenv("CHECK_INTERVAL", "30"))
-    restart_delay = int(os.getenv("RESTART_DELAY", "15"))
-    roblox_cookie = os.getenv("ROBLOX_COOKIE")
 
-    discord = DiscordNotifier(user_id)
+class StateJournal:
+    def __init__(self, path):
+        self.path = path
+        self.accounts = {}
+        self.lock = threading.Lock()
 
-    if not ps_link or "YOUR_CODE" in ps_link:
-        print("Error: Configure PS_LINK in .env file")
-        print("Run: python setup.py")
-        return
+    def load(self):
+        try:
+            with open(self.path) as f:
+                self.accounts = json.load(f).get("accounts", {})
+        except (OSError, ValueError, AttributeError):
+            self.accounts = {}
+
+    def get(self, package):
+        return self.accounts.get(package)
+
+    def update(self, package, entry):
+        with self.lock:
+            if self.accounts.get(package) == entry:
+                return
+            self.accounts[package] = entry
+            # Write-then-rename so a kill mid-write never leaves a torn file
+            tmp_path = f"{self.path}.tmp"
+            try:
+                with open(tmp_path, "w") as f:
+                    json.dump({"accounts": self.accounts}, f)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, self.path)
+            except OSError:
+                pass
 
-    print(f"Config: User {user_id}, Interval {interval}s")
 
-    force_stop_roblox()
-    time.sleep(2)
+state_journal = StateJournal(os.getenv("STATE_FILE", ".auto_rejoin_state.json"))
 
-    if not open_ps_link(ps_link):
-        print("Error: Failed to open Roblox")
-        return
 
-    print(f"Initializing...")
-    time.sleep(restart_delay * 2)
+def read_setting(env, name, default, minimum=0, parse=int):
+    value = env.get(name, "").strip() or str(default)
+    kind = "a whole number" if parse is int else "a number"
+    try:
+        number = parse(value)
+    except ValueError:
+        raise ValueError(f"{name} must be {kind}, got {value!r}")
+    if not math.isfinite(number):
+        raise ValueError(f"{name} must be {kind}, got {value!r}")
+    if number < minimum:
+        raise ValueError(f"{name} must be at least {minimum}, got {number}")
+    return number
+
+
+def load_settings(env=os.environ):
+    interval = read_setting(env, "CHECK_INTERVAL", 30, 1)
+    restart_delay = read_setting(env, "RESTART_DELAY", 15, 1)
+    return {
+        "interval": interval,
+        "restart_delay": restart_delay,
+        "join_timeout": read_setting(env, "JOIN_TIMEOUT", restart_delay * 4, 1),
+        "network_idle_timeout": read_setting(env, "NETWORK_IDLE_TIMEOUT", 60),
+        # Polling presence less often while traffic is live is opt-in: a server
+        # switch is only visible through presence
+        "presence_interval": read_setting(env, "PRESENCE_INTERVAL", interval, 1),
+        "freeze_timeout": read_setting(env, "FREEZE_TIMEOUT", 120),
+        "memory_limit_mb": read_setting(env, "MEMORY_LIMIT_MB", 0),
+        "memory_oom_horizon": read_setting(env, "MEMORY_OOM_HORIZON", 900),
+        "min_interval": read_setting(
+            env, "CHECK_INTERVAL_MIN", max(5, interval // 3), 1
+        ),
+        # Relaxing beyond CHECK_INTERVAL is opt-in, so detection never slows down
+        "max_interval": read_setting(env, "CHECK_INTERVAL_MAX", interval, 1),
+    }
+
+
+def load_launch_settings(env=os.environ):
+    return {
+        "concurrency": read_setting(env, "LAUNCH_CONCURRENCY", 2, 1),
+        "max_cpu": read_setting(env, "LAUNCH_MAX_CPU", 85, 0, float),
+        "min_free_mb": read_setting(env, "LAUNCH_MIN_FREE_MB", 600, 0, float),
+        "jitter": read_setting(env, "LAUNCH_JITTER", 3, 0, float),
+    }
+
+
+def validate_accounts(accounts):
+    for account in accounts:
+        if not account.ps_link or "YOUR_CODE" in account.ps_link:
+            raise ValueError("Configure PS_LINK in .env file (run: python setup.py)")
+    packages = [account.package for account in accounts]
+    if len(set(packages)) != len(packages):
+        raise ValueError("Each account in FLEET_FILE needs its own package")
+
+
+class ConfigWatcher:
+    def __init__(self, path, interval):
+        self.path = path
+        self.interval = interval
+        self.values = {}
+        self.stamp = self.seen = None
+        self.next_check_at = math.inf
+
+    def read_stamp(self):
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+    def start(self):
+        if self.interval <= 0:
+            return
+        self.stamp = self.seen = self.read_stamp()
+        self.values = self.read_file()
+        self.next_check_at = time.monotonic() + self.interval
+
+    def changed(self):
+        now = time.monotonic()
+        if now < self.next_check_at:
+            return False
+        self.next_check_at = now + self.interval
+        stamp = self.read_stamp()
+        if stamp != self.seen:
+            # Wait for the stamp to hold still so a half-written file is skipped
+            self.seen = stamp
+            return False
+        if stamp is None or stamp == self.stamp:
+            return False
+        self.stamp = stamp
+        return True
+
+    def read_file(self):
+        return {
+            k: v
+            for k, v in dotenv_values(self.path).items()
+            if v is not None and k not in PROCESS_ENV_KEYS
+        }
+
+    def read_env(self):
+        values = self.read_file()
+        env = dict(os.environ)
+        for key in self.values:
+            if key not in values:
+                env.pop(key, None)
+        env.update(values)
+        return values, env
+
+    def commit(self, values):
+        for key in self.values:
+            if key not in values:
+                os.environ.pop(key, None)
+        os.environ.update(values)
+        self.values = values
+
+
+config_watcher = ConfigWatcher(".env", int(os.getenv("CONFIG_RELOAD_INTERVAL", "2")))
+
+
+def reload_config(monitors, scheduler):
+    # Everything is parsed and validated before anything changes
+    try:
+        values, env = config_watcher.read_env()
+        settings = load_settings(env)
+        launch_settings = load_launch_settings(env)
+        accounts = load_accounts(env.get("ROBLOX_COOKIE"), env)
+        validate_accounts(accounts)
+        current = {m.account.package: m.account.user_id for m in monitors}
+        if {a.package: a.user_id for a in accounts} != current:
+            raise ValueError("adding, removing or changing accounts needs a restart")
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        print(f"Config reload failed, keeping current settings: {e}")
+        return False
+
+    config_watcher.commit(values)
+    by_package = {account.package: account for account in accounts}
+    for monitor in monitors:
+        account = by_package[monitor.account.package]
+        # Takes effect from the next rejoin, the running client is left alone
+        monitor.account.ps_link = account.ps_link
+        monitor.account.roblox_cookie = account.roblox_cookie
+        monitor.account.priority = account.priority
+        monitor.apply_settings(settings)
+        monitor.discord.reconfigure()
+    scheduler.configure(launch_settings)
+    print(f"Config reloaded (Interval {settings['interval']}s)")
+    return True
+
+
+class AccountMonitor:
+    # Join readiness is polled early, then less often until join_timeout
+    JOIN_POLL_INITIAL = 5.0
+    JOIN_POLL_MAX = 15.0
+    JOIN_POLL_BACKOFF = 1.5
+    # Weight of the latest check in the failure EWMA, and how much a clean
+    # check stretches the interval when that EWMA is zero
+    INSTABILITY_ALPHA = 0.3
+    RELAX_FACTOR = 0.5
+
+    def __init__(
+        self,
+        account,
+        discord,
+        interval,
+        restart_delay,
+        prefix="",
+        join_timeout=None,
+        network_idle_timeout=0,
+        presence_interval=None,
+        freeze_timeout=0,
+        memory_limit_mb=0,
+        memory_oom_horizon=0,
+        min_interval=None,
+        max_interval=None,
+    ):
+        self.account = account
+        self.discord = discord
+        self.interval = interval
+        self.max_interval = max_interval or interval
+        self.min_interval = min(min_interval or interval, self.max_interval)
+        # Joins are when failures cluster, so checks start tight and relax
+        self.check_interval = self.min_interval
+        self.instability = 0.0
+        self.restart_delay = restart_delay
+        self.join_timeout = join_timeout or restart_delay * 4
+        self.prefix = prefix
+        self.network = (
+            NetworkActivity(network_idle_timeout) if network_idle_timeout else None
+        )
+        self.presence_interval = presence_interval or interval
+        self.hang = HangDetector(freeze_timeout) if freeze_timeout else None
+        self.memory = (
+            MemoryWatchdog(memory_limit_mb, memory_oom_horizon)
+            if memory_limit_mb or memory_oom_horizon
+            else None
+        )
+        self.log_reason = None
+        self.launch_pending = False
+        self.pending_leaving_game_id = None
+        self.presence_checked_at = 0.0
+        self.expected_game_id = None
+        self.last_game_id = None
+        self.started = False
+        self.confirm_at = None
+        self.join_deadline = None
+        self.leaving_game_id = None
+        self.rejoin_started_at = None
+        self.join_poll_delay = self.JOIN_POLL_INITIAL
+        self.next_check_at = 0.0
+
+    def log(self, message=""):
+        print(f"{self.prefix}{message}" if message else "")
+
+    def apply_settings(self, settings):
+        self.interval = settings["interval"]
+        self.restart_delay = settings["restart_delay"]
+        self.join_timeout = settings["join_timeout"] or self.restart_delay * 4
+        self.presence_interval = settings["presence_interval"] or self.interval
+        self.max_interval = settings["max_interval"] or self.interval
+        self.min_interval = min(
+            settings["min_interval"] or self.interval, self.max_interval
+        )
+        self.check_interval = min(
+            max(self.check_interval, self.min_interval), self.max_interval
+        )
+        self.next_check_at = min(
+            self.next_check_at, time.monotonic() + self.check_interval
+        )
+
+        # Detectors keep their samples unless they are switched off
+        network_idle_timeout = settings["network_idle_timeout"]
+        if not network_idle_timeout:
+            self.network = None
+        elif self.network is None:
+            self.network = NetworkActivity(network_idle_timeout)
+        else:
+            self.network.idle_timeout = network_idle_timeout
+
+        freeze_timeout = settings["freeze_timeout"]
+        if not freeze_timeout:
+            self.hang = None
+        elif self.hang is None:
+            self.hang = HangDetector(freeze_timeout)
+        else:
+            self.hang.timeout = freeze_timeout
+
+        limit_mb = settings["memory_limit_mb"]
+        oom_horizon = settings["memory_oom_horizon"]
+        if not limit_mb and not oom_horizon:
+            self.memory = None
+        elif self.memory is None:
+            self.memory = MemoryWatchdog(limit_mb, oom_horizon)
+        else:
+            self.memory.limit_mb = limit_mb
+            self.memory.oom_horizon = oom_horizon
+
+    def save_state(self):
+        locator = get_process_locator(self.account.package)
+        locator.locate()
+        state_journal.update(
+            self.account.package,
+            {
+                "user_id": self.account.user_id,
+                "ps_link": self.account.ps_link,
+                "expected_game_id": self.expected_game_id,
+                "last_game_id": self.last_game_id,
+                "pid": locator.pid,
+                "start_time": locator.start_time,
+            },
+        )
+
+    def can_resume(self):
+        entry = state_journal.get(self.account.package)
+        if (
+            not entry
+            or not entry.get("pid")
+            or entry.get("user_id") != self.account.user_id
+            or entry.get("ps_link") != self.account.ps_link
+        ):
+            return False
 
-    _, private_game_id, _ = check_user_presence(user_id, roblox_cookie)
+        # Same PID and start time means the very process we were monitoring
+        locator = get_process_locator(self.account.package)
+        locator.pid = entry["pid"]
+        locator.start_time = entry.get("start_time")
+        return locator.is_alive()
+
+    def resume(self, presence):
+        entry = state_journal.get(self.account.package)
+        is_ingame, game_id, _ = presence
+        expected_game_id = entry.get("expected_game_id")
+        if not is_ingame or not game_id:
+            return False
+        if expected_game_id and game_id != expected_game_id:
+            return False
 
-    if private_game_id:
-        print(f"Game ID: {private_game_id[:12]}...")
+        self.expected_game_id = expected_game_id or game_id
+        self.last_game_id = entry.get("last_game_id")
+        self.started = True
+        self.confirm_at = None
+        self.next_check_at = time.monotonic() + self.check_interval
+        self.log(f"Resumed running session (Game ID: {game_id[:12]}...)")
+        metrics.set("auto_rejoin_in_game", 1, account=self.account.name)
+        self.save_state()
+        self.discord.notify_start(self.account.user_id, self.interval)
+        return True
+
+    def record_check(self, failed):
+        self.instability += self.INSTABILITY_ALPHA * (failed - self.instability)
+        if failed:
+            self.check_interval = self.min_interval
+        else:
+            # Relax geometrically, slower while recent history is unstable
+            self.check_interval = min(
+                self.check_interval
+                * (1 + self.RELAX_FACTOR * (1 - self.instability)),
+                self.max_interval,
+            )
 
-    print("Monitoring active (Ctrl+C to stop)\n")
+    def queue_launch(self, leaving_game_id=None):
+        # The supervisor's LaunchScheduler decides when launch() runs
+        self.launch_pending = True
+        self.pending_leaving_game_id = leaving_game_id
+
+    def launch(self, leaving_game_id=None):
+        # Presence can lag behind; never confirm a join on the server we left
+        self.leaving_game_id = leaving_game_id
+        self.log_reason = None
+        if force_stop_roblox(self.account.package):
+            time.sleep(2)
+        success = open_ps_link(self.account.ps_link, self.account.package)
+        now = time.monotonic()
+        self.join_poll_delay = self.JOIN_POLL_INITIAL
+        self.join_deadline = now + self.join_timeout
+        self.confirm_at = now + self.join_poll_delay
+        return success
+
+    def join_ready(self, presence):
+        is_ingame, game_id, _ = presence
+        if game_id == self.leaving_game_id:
+            game_id = None
+        if (is_ingame and game_id) or time.monotonic() >= self.join_deadline:
+            return True
 
-    discord.notify_start(user_id, interval)
+        self.join_poll_delay = min(
+            self.join_poll_delay * self.JOIN_POLL_BACKOFF, self.JOIN_POLL_MAX
+        )
+        self.confirm_at = min(
+            time.monotonic() + self.join_poll_delay, self.join_deadline
+        )
+        return False
 
-    expected_game_id = private_game_id
-    last_game_id = None
+    def needs_presence(self):
+        if self.confirm_at is not None:
+            return True
+        if self.log_reason:
+            # logcat already saw the disconnect
+            return False
+        if self.network is None:
+            return True
+        if self.memory is not None and self.memory.restart_reason():
+            # A planned restart waits for presence to confirm the client in-game
+            return True
+        active = self.network.sample(get_roblox_pid(self.account.package))
+        if not active:
+            # Idle or unreadable: only the presence API can tell
+            return True
+        return time.monotonic() - self.presence_checked_at >= self.presence_interval
+
+    def freeze_verdict(self):
+        if self.hang is not None and self.hang.sample(
+            get_roblox_pid(self.account.package)
+        ):
+            return "Client frozen"
+        return None
+
+    def memory_verdict(self, presence):
+        if self.memory is None:
+            return None
+        self.memory.sample(get_roblox_pid(self.account.package))
+        _, game_id, _ = presence
+        # Restart right after a check that found the client in its game, never
+        # while it is joining or on the wrong server
+        if not game_id or (self.expected_game_id and game_id != self.expected_game_id):
+            return None
+        detail = self.memory.restart_reason()
+        if detail:
+            self.log(f"Memory: {detail}")
+            return "Memory restart"
+        return None
+
+    def network_verdict(self, presence):
+        if self.network is None or not self.network.idle():
+            return None
+        _, game_id, _ = presence
+        if game_id:
+            # Presence places the client in a game, trust it over the counters
+            self.network.reset()
+            return None
+        return "No network activity"
+
+    def due_at(self):
+        if self.launch_pending:
+            return math.inf
+        if self.confirm_at is not None:
+            return self.confirm_at
+        return self.next_check_at
+
+    def step(self, presence):
+        if self.confirm_at is not None:
+            if not self.join_ready(presence):
+                return
+            self.confirm_at = None
+            if self.started:
+                self.confirm_rejoin(presence)
+            else:
+                self.confirm_start(presence)
+        else:
+            self.check(presence)
+        self.next_check_at = time.monotonic() + self.check_interval
+
+    def confirm_start(self, presence):
+        _, private_game_id, _ = presence
+
+        if private_game_id:
+            self.log(f"Game ID: {private_game_id[:12]}...")
+
+        self.expected_game_id = private_game_id
+        self.started = True
+        self.save_state()
+        self.discord.notify_start(self.account.user_id, self.interval)
+
+    def confirm_rejoin(self, presence):
+        _, new_game_id, new_universe_id = presence
+        if new_game_id == self.leaving_game_id:
+            new_game_id = None
+        if self.rejoin_started_at is not None:
+            metrics.observe(
+                "auto_rejoin_rejoin_duration_seconds",
+                time.monotonic() - self.rejoin_started_at,
+                Metrics.REJOIN_BUCKETS,
+                account=self.account.name,
+            )
+            self.rejoin_started_at = None
+        metrics.set(
+            "auto_rejoin_in_game", 1 if new_game_id else 0, account=self.account.name
+        )
+        if new_game_id:
+            self.expected_game_id = new_game_id
+            new_game_name = get_game_name(new_universe_id, retry=False)
+            self.log("Rejoined successfully")
+            if new_game_name:
+                self.log(f"Game: {new_game_name}")
+            self.log()
+            self.log()
+            self.last_game_id = new_game_id
+            self.save_state()
+            self.discord.notify_status("Rejoined", new_game_id, new_universe_id)
+        else:
+            self.log("Rejoined (Game ID unavailable)\n")
+            self.last_game_id = None
+            self.save_state()
+            # Fallback notification
+            self.discord.notify_status("Rejoined (Waiting for data...)", None, None)
+
+    def check(self, presence):
+        needs_rejoin, reason, current_game_id, universe_id = should_rejoin(
+            self.account.user_id,
+            self.expected_game_id,
+            self.account.roblox_cookie,
+            self.account.package,
+            presence,
+        )
+
+        if not needs_rejoin:
+            local_reason = (
+                self.log_reason
+                or self.freeze_verdict()
+                or self.network_verdict(presence)
+                or self.memory_verdict(presence)
+            )
+            if local_reason:
+                needs_rejoin, reason = True, local_reason
+
+        if needs_rejoin:
+            self.begin_rejoin(reason, current_game_id)
+            self.queue_launch(current_game_id if reason == "Server switched" else None)
+            return
+
+        self.record_check(False)
+        status = self.track(current_game_id)
+        if status:
+            self.report_status(status, current_game_id, universe_id)
+
+    def begin_rejoin(self, reason, current_game_id):
+        self.rejoin_started_at = time.monotonic()
+        self.record_check(True)
+        metrics.inc("auto_rejoin_rejoins_total", account=self.account.name, reason=reason)
+        metrics.set("auto_rejoin_in_game", 0, account=self.account.name)
+        self.log(f"{reason} - Rejoining...")
+        self.discord.notify_rejoin(reason, current_game_id)
+
+    def track(self, current_game_id):
+        metrics.set("auto_rejoin_in_game", 1, account=self.account.name)
+        if not self.expected_game_id and current_game_id:
+            self.expected_game_id = current_game_id
+            self.log(f"Tracking Game ID: {self.expected_game_id[:12]}...")
+            self.save_state()
+
+        status = (
+            "In-Game"
+            if (
+                current_game_id
+                and self.expected_game_id
+                and current_game_id == self.expected_game_id
+            )
+            else "In-Game (Unknown server)"
+        )
+
+        if current_game_id and current_game_id != self.last_game_id:
+            self.last_game_id = current_game_id
+            self.save_state()
+            return status
+        return None
+
+    def report_status(self, status, game_id, universe_id):
+        game_name = get_game_name(universe_id, retry=False)
+        self.log(f"{status}")
+        if game_name:
+            self.log(f"Game: {game_name}")
+        self.discord.notify_status(status, game_id, universe_id)
+
+
+class LaunchScheduler:
+    def __init__(self, settings=None):
+        self.configure(settings or load_launch_settings())
+        self.waiting = {}
+        self.active = set()
+
+    def configure(self, settings):
+        self.concurrency = settings["concurrency"]
+        self.max_cpu = settings["max_cpu"]
+        self.min_free_mb = settings["min_free_mb"]
+        self.jitter = settings["jitter"]
+
+    def request(self, monitor):
+        if monitor not in self.waiting and monitor not in self.active:
+            self.waiting[monitor] = time.monotonic() + random.uniform(0, self.jitter)
+
+    def release(self, monitor):
+        self.active.discard(monitor)
+        self.waiting.pop(monitor, None)
+
+    def has_budget(self):
+        current = system_sampler.current
+        if current is None:
+            return True
+        return (
+            current["cpu_percent"] < self.max_cpu
+            and current["ram_available_mb"] >= self.min_free_mb
+        )
+
+    def admit(self):
+        # Highest priority first, then whoever has been down the longest
+        now = time.monotonic()
+        order = sorted(
+            self.waiting,
+            key=lambda m: (-m.account.priority, m.rejoin_started_at or 0.0),
+        )
+        admitted = []
+        for monitor in order:
+            if len(self.active) >= self.concurrency:
+                break
+            # With nothing else starting, launch at once; otherwise stagger the
+            # cold starts and only add one while the device has headroom
+            if self.active and (now < self.waiting[monitor] or not self.has_budget()):
+                continue
+            del self.waiting[monitor]
+            self.active.add(monitor)
+            admitted.append(monitor)
+        return admitted
+
+    def next_wakeup(self):
+        if not self.waiting:
+            return math.inf
+        # Budget is re-read at least every second while anyone is waiting
+        return min(min(self.waiting.values()), time.monotonic() + 1.0)
+
+
+class ExitWatcher:
+    def __init__(self):
+        self.watches = {}
+        self.supported = hasattr(os, "pidfd_open")
+
+    def watch(self, key, locator):
+        # Returns False when the located process turns out to be gone already
+        pid = locator.pid
+        if key in self.watches and self.watches[key][0] == pid:
+            return True
+        self.unwatch(key)
+        if not self.supported or pid is None:
+            return True
 
-    while True:
         try:
-            needs_rejoin, reason, current_game_id, universe_id = should_rejoin(
-                user_id, expected_game_id, roblox_cookie
+            pidfd = os.pidfd_open(int(pid))
+        except ProcessLookupError:
+            # Exited between the lookup and pidfd_open
+            return False
+        except OSError as e:
+            if e.errno in (errno.ENOSYS, errno.EINVAL, errno.EPERM):
+                # Kernel without pidfd support (< 5.3) or a seccomp filter
+                # blocking it: fall back to polling
+                self.supported = False
+            return True
+
+        # The PID may have been reused between the lookup and pidfd_open
+        if not locator.is_alive():
+            os.close(pidfd)
+            return False
+        self.watches[key] = (pid, pidfd)
+        return True
+
+    def unwatch(self, key):
+        watch = self.watches.pop(key, None)
+        if watch:
+            os.close(watch[1])
+
+    def wait(self, timeout, readers=None):
+        # readers maps extra fds (e.g. logcat streams) to keys to wake up for
+        readers = readers or {}
+        fds = {pidfd: key for key, (_, pidfd) in self.watches.items()}
+        if not fds and not readers:
+            time.sleep(timeout)
+            return [], []
+
+        readable, _, _ = select.select(list(fds) + list(readers), [], [], timeout)
+
+        exited = [fds[fd] for fd in readable if fd in fds]
+        for key in exited:
+            self.unwatch(key)
+        return exited, [readers[fd] for fd in readable if fd in readers]
+
+
+# Checked in order; the first alternative matching at a position wins, so a
+# kick's error code is not reported as a plain disconnect
+LOGCAT_SIGNATURES = re.compile(
+    rb"(?P<teleport>Teleport(?:ation)? failed|Error Code: 77\d\b)"
+    rb"|(?P<kick>kicked from (?:this|the) (?:experience|game)"
+    rb"|Client has been kicked|Error Code: 267\b)"
+    rb"|(?P<disconnect>Lost connection to the game server|ID_CONNECTION_LOST"
+    rb"|ID_DISCONNECTION_NOTIFICATION|Disconnection Notification"
+    rb"|Sending disconnect with reason|Error Code: 2[0-9]{2}\b)",
+    re.IGNORECASE,
+)
+LOGCAT_ERROR_CODE = re.compile(rb"(?:Error Code|reason):? (\d+)", re.IGNORECASE)
+LOGCAT_REASONS = {
+    "teleport": "Teleport failed",
+    "kick": "Kicked",
+    "disconnect": "Disconnected",
+}
+
+
+class LogcatParser:
+    def __init__(self):
+        self.partial = b""
+
+    def feed(self, data):
+        # Only complete lines are matched; the tail waits for the next chunk
+        lines = (self.partial + data).split(b"\n")
+        self.partial = lines.pop()
+        events = []
+        for line in lines:
+            match = LOGCAT_SIGNATURES.search(line)
+            if match:
+                reason = LOGCAT_REASONS[match.lastgroup]
+                code = LOGCAT_ERROR_CODE.search(line)
+                if code:
+                    reason = f"{reason} (Error {code.group(1).decode()})"
+                events.append(reason)
+        return events
+
+
+class LogcatStream:
+    def __init__(self, pid, proc):
+        self.pid = pid
+        self.proc = proc
+        self.parser = LogcatParser()
+        # PID of the root-side logcat, echoed as the first line of the stream
+        self.root_pid = None
+        self.header = b""
+
+    def take_header(self, data):
+        if self.root_pid is not None:
+            return data
+        self.header += data
+        line, newline, rest = self.header.partition(b"\n")
+        if not newline:
+            return b""
+        self.header = b""
+        self.root_pid = int(line) if line.strip().isdigit() else 0
+        return rest
+
+    def fileno(self):
+        return self.proc.stdout.fileno()
+
+
+class LogcatWatcher:
+    def __init__(self):
+        self.enabled = os.getenv("LOGCAT_WATCH", "true").lower() == "true"
+        self.streams = {}
+        # PIDs whose logcat could not be started or died; retried on a new PID
+        self.failed = {}
+        # `su -c kill` clients still running, reaped on a later unwatch
+        self.killers = []
+
+    def watch(self, key, pid):
+        stream = self.streams.get(key)
+        if stream and stream.pid == pid:
+            return
+        self.unwatch(key)
+        if not self.enabled or pid is None or self.failed.get(key) == pid:
+            return
+
+        try:
+            proc = subprocess.Popen(
+                [
+                    "su",
+                    "-c",
+                    f"echo $$; exec logcat -v brief -T 1 --pid={pid} '*:I'",
+                ],
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+            )
+        except OSError:
+            self.failed[key] = pid
+            return
+        self.streams[key] = LogcatStream(pid, proc)
+
+    def unwatch(self, key):
+        stream = self.streams.pop(key, None)
+        if stream:
+            if stream.root_pid is None:
+                os.set_blocking(stream.fileno(), False)
+                try:
+                    stream.take_header(os.read(stream.fileno(), 64))
+                except OSError:
+                    pass
+            # Under Magisk/KernelSU logcat runs in the root daemon, not under
+            # the su client, and --pid filtering leaves it nothing to write,
+            # so it never sees SIGPIPE. Kill it without waiting on su, as this
+            # runs on the supervisor thread / event loop
+            self.killers = [p for p in self.killers if p.poll() is None]
+            if stream.root_pid:
+                try:
+                    self.killers.append(
+                        subprocess.Popen(
+                            ["su", "-c", f"kill {stream.root_pid}"],
+                            stdin=subprocess.DEVNULL,
+                            stdout=subprocess.DEVNULL,
+                            stderr=subprocess.DEVNULL,
+                        )
+                    )
+                except OSError:
+                    pass
+            stream.proc.kill()
+            stream.proc.stdout.close()
+            stream.proc.wait()
+
+    def readers(self):
+        return {stream.fileno(): key for key, stream in self.streams.items()}
+
+    def read(self, key):
+        stream = self.streams[key]
+        data = os.read(stream.fileno(), 65536)
+        if not data:
+            self.failed[key] = stream.pid
+            self.unwatch(key)
+            return None
+        events = stream.parser.feed(stream.take_header(data))
+        return events[0] if events else None
+
+    def close(self):
+        for key in list(self.streams):
+            self.unwatch(key)
+
+
+def resume_monitors(monitors):
+    # Adopt clients that survived a monitor restart instead of relaunching them
+    candidates = [m for m in monitors if m.can_resume()]
+    if not candidates:
+        return set()
+
+    presences = poll_presence(candidates)
+    return {m for m in candidates if m.resume(presences[m.account.user_id])}
+
+
+class FleetSupervisor:
+    # Monitors due within this window share the current presence request
+    BATCH_WINDOW = 2.0
+
+    def __init__(self, monitors):
+        self.monitors = monitors
+        self.active = False
+        self.stopping = False
+        self.exit_watcher = ExitWatcher()
+        self.logcat = LogcatWatcher()
+        self.scheduler = LaunchScheduler()
+
+    def start(self):
+        resumed = resume_monitors(self.monitors)
+        for monitor in self.monitors:
+            if monitor not in resumed:
+                monitor.queue_launch()
+        launched = self.launch_pending()
+        return bool(resumed) or launched or bool(self.scheduler.waiting)
+
+    def launch_pending(self):
+        launched = False
+        for monitor in self.monitors:
+            if monitor.launch_pending:
+                self.scheduler.request(monitor)
+            elif monitor.confirm_at is None:
+                # Joined (or gave up joining), so the slot is free again
+                self.scheduler.release(monitor)
+
+        for monitor in self.scheduler.admit():
+            monitor.launch_pending = False
+            if monitor.launch(monitor.pending_leaving_game_id):
+                launched = True
+            else:
+                monitor.log("Error: Failed to open Roblox")
+        return launched
+
+    def tick(self):
+        if config_watcher.changed():
+            reload_config(self.monitors, self.scheduler)
+
+        now = time.monotonic()
+        due = [m for m in self.monitors if m.due_at() <= now + self.BATCH_WINDOW]
+        if not due:
+            self.launch_pending()
+            return
+
+        # A client that is not running needs no presence lookup to rejoin, and
+        # one with live game traffic only needs it every presence_interval
+        polled = [
+            m
+            for m in due
+            if m.confirm_at is not None
+            or (is_roblox_running(m.account.package) and m.needs_presence())
+        ]
+        presences = poll_presence(polled) if polled else {}
+        for monitor in polled:
+            monitor.presence_checked_at = now
+        # Only monitors on a new game report a status; resolve those names in
+        # one request, failing fast so a games API outage can't stall the tick
+        changed = []
+        for monitor in polled:
+            _, game_id, universe_id = presences.get(
+                monitor.account.user_id, (None, None, None)
             )
+            if game_id and game_id != monitor.last_game_id:
+                changed.append(universe_id)
+        get_game_names(changed, retry=False)
 
-            if needs_rejoin:
-                print(f"{reason} - Rejoining...")
-
-                discord.notify_rejoin(reason, current_game_id)
-
-                force_stop_roblox()
-                time.sleep(2)
-                open_ps_link(ps_link)
-                time.sleep(restart_delay * 2)
-
-                _, new_game_id, new_universe_id = check_user_presence(user_id, roblox_cookie)
-                if new_game_id:
-                    expected_game_id = new_game_id
-                    new_game_name = get_game_name(new_universe_id)
-                    print("Rejoined successfully")
-                    if new_game_name:
-                        print(f"Game: {new_game_name}")
-                    print()
-                    print()
-                    last_game_id = new_game_id
-                    discord.notify_status("Rejoined", new_game_id, new_universe_id)
-                else:
-                    print("Rejoined (Game ID unavailable)\n")
-                    last_game_id = None
-                    # Fallback notification
-                    discord.notify_status("Rejoined (Waiting for data...)", None, None)
+        for monitor in due:
+            try:
+                presence = presences.get(monitor.account.user_id, (True, None, None))
+                monitor.step(presence)
+            except Exception as e:
+                error_msg = str(e)
+                monitor.log(f"Error: {error_msg}")
+                monitor.discord.notify_error(error_msg)
+                monitor.record_check(True)
+                monitor.next_check_at = time.monotonic() + 5
+        self.launch_pending()
+
+        if not self.active and all(m.started for m in self.monitors):
+            self.active = True
+            print("Monitoring active (Ctrl+C to stop)\n")
+
+        self.watch_processes()
+
+    def watch_processes(self):
+        # Launching clients are left alone, they get killed and restarted on purpose
+        for monitor in self.monitors:
+            locator = get_process_locator(monitor.account.package)
+            if monitor.confirm_at is None and locator.locate():
+                if not self.exit_watcher.watch(monitor, locator):
+                    # Exited right after it was located, check it again now
+                    monitor.next_check_at = time.monotonic()
+                self.logcat.watch(monitor, locator.pid)
             else:
-                if not expected_game_id and current_game_id:
-                    expected_game_id = current_game_id
-                    print(f"Tracking Game ID: {expected_game_id[:12]}...")
-
-                status = (
-                    "In-Game"
-                    if (
-                        current_game_id
-                        and expected_game_id
-                        and current_game_id == expected_game_id
+                self.exit_watcher.unwatch(monitor)
+                self.logcat.unwatch(monitor)
+
+    def read_logcat(self, monitor):
+        reason = self.logcat.read(monitor)
+        if reason and monitor.confirm_at is None:
+            # Rejoin on the next tick without waiting for presence to catch up
+            monitor.log_reason = reason
+            monitor.next_check_at = time.monotonic()
+
+    def stop(self):
+        self.stopping = True
+
+    def run(self):
+        while not self.stopping:
+            try:
+                self.tick()
+                next_due = min(
+                    min(m.due_at() for m in self.monitors),
+                    self.scheduler.next_wakeup(),
+                    config_watcher.next_check_at,
+                )
+                exited, logged = self.exit_watcher.wait(
+                    max(0.0, next_due - time.monotonic()), self.logcat.readers()
+                )
+                for monitor in exited:
+                    # Check the crashed client right away instead of at its next tick
+                    monitor.next_check_at = time.monotonic()
+                for monitor in logged:
+                    self.read_logcat(monitor)
+            except KeyboardInterrupt:
+                print("\nStopped by user\n")
+                break
+            except Exception as e:
+                error_msg = str(e)
+                print(f"Error: {error_msg}")
+                self.monitors[0].discord.notify_error(error_msg)
+                time.sleep(5)
+        self.logcat.close()
+
+
+class EngineState:
+    def __init__(self, monitors):
+        self.monitors = monitors
+        self.rejoining = set()
+        self.process_wake = None
+
+
+class AsyncEngine:
+    PROCESS_CHECK_INTERVAL = 2.0
+    LAUNCH_POLL_INTERVAL = 0.1
+
+    def __init__(self, monitors):
+        self.state = EngineState(monitors)
+        self.exit_watcher = ExitWatcher()
+        self.logcat = LogcatWatcher()
+        self.scheduler = LaunchScheduler()
+        self.status_queue = None
+        self.loop = None
+        self.task = None
+
+    def blocking(self, func, *args):
+        return self.loop.run_in_executor(None, func, *args)
+
+    def report_error(self, monitor, error):
+        error_msg = str(error)
+        monitor.log(f"Error: {error_msg}")
+        monitor.discord.notify_error(error_msg)
+        monitor.record_check(True)
+
+    def watch_exit(self, monitor):
+        locator = get_process_locator(monitor.account.package)
+        watch = self.exit_watcher.watches.get(monitor)
+        if watch and watch[0] == locator.pid:
+            return True
+        self.unwatch_exit(monitor)
+        if not self.exit_watcher.watch(monitor, locator):
+            return False
+        watch = self.exit_watcher.watches.get(monitor)
+        if watch:
+            self.loop.add_reader(watch[1], self.on_exit, monitor)
+        return True
+
+    def unwatch_exit(self, monitor):
+        watch = self.exit_watcher.watches.get(monitor)
+        if watch:
+            self.loop.remove_reader(watch[1])
+            self.exit_watcher.unwatch(monitor)
+
+    def on_exit(self, monitor):
+        self.unwatch_exit(monitor)
+        self.state.process_wake.set()
+
+    def watch_log(self, monitor):
+        pid = get_process_locator(monitor.account.package).pid
+        stream = self.logcat.streams.get(monitor)
+        if stream and stream.pid == pid:
+            return
+        self.unwatch_log(monitor)
+        self.logcat.watch(monitor, pid)
+        stream = self.logcat.streams.get(monitor)
+        if stream:
+            self.loop.add_reader(stream.fileno(), self.on_log, monitor)
+
+    def unwatch_log(self, monitor):
+        stream = self.logcat.streams.get(monitor)
+        if stream:
+            self.loop.remove_reader(stream.fileno())
+            self.logcat.unwatch(monitor)
+
+    def on_log(self, monitor):
+        stream = self.logcat.streams[monitor]
+        fd = stream.fileno()
+        reason = self.logcat.read(monitor)
+        if monitor not in self.logcat.streams:
+            # logcat exited; read() already closed the stream
+            self.loop.remove_reader(fd)
+        if reason:
+            self.request_rejoin(monitor, reason)
+
+    def active_monitors(self):
+        return [
+            m
+            for m in self.state.monitors
+            if m.started and m not in self.state.rejoining
+        ]
+
+    async def launch(self, monitor, leaving_game_id=None):
+        import asyncio
+
+        self.scheduler.request(monitor)
+        try:
+            while monitor not in self.scheduler.active:
+                self.scheduler.admit()
+                if monitor not in self.scheduler.active:
+                    await asyncio.sleep(self.LAUNCH_POLL_INTERVAL)
+            await self.join(monitor, leaving_game_id)
+        finally:
+            self.scheduler.release(monitor)
+
+    async def join(self, monitor, leaving_game_id):
+        import asyncio
+
+        success = await self.blocking(monitor.launch, leaving_game_id)
+        if not success:
+            monitor.log("Error: Failed to open Roblox")
+
+        while True:
+            await asyncio.sleep(max(0.0, monitor.confirm_at - time.monotonic()))
+            presence = await self.blocking(
+                check_user_presence,
+                monitor.account.user_id,
+                monitor.account.roblox_cookie,
+            )
+            if monitor.join_ready(presence):
+                break
+
+        monitor.confirm_at = None
+        monitor.next_check_at = time.monotonic() + monitor.check_interval
+        if monitor.started:
+            await self.blocking(monitor.confirm_rejoin, presence)
+        else:
+            await self.blocking(monitor.confirm_start, presence)
+
+    async def rejoin(self, monitor, reason, current_game_id):
+        try:
+            monitor.begin_rejoin(reason, current_game_id)
+            await self.launch(
+                monitor, current_game_id if reason == "Server switched" else None
+            )
+        except Exception as e:
+            self.report_error(monitor, e)
+        finally:
+            self.state.rejoining.discard(monitor)
+
+    def request_rejoin(self, monitor, reason, current_game_id=None):
+        import asyncio
+
+        if monitor in self.state.rejoining:
+            return
+        self.state.rejoining.add(monitor)
+        self.unwatch_exit(monitor)
+        self.unwatch_log(monitor)
+        asyncio.ensure_future(self.rejoin(monitor, reason, current_game_id))
+
+    async def process_task(self):
+        import asyncio
+
+        while True:
+            recheck = False
+            for monitor in self.active_monitors():
+                try:
+                    running = await self.blocking(
+                        is_roblox_running, monitor.account.package
                     )
-                    else "In-Game (Unknown server)"
+                    if monitor in self.state.rejoining:
+                        # A rejoin started while pidof ran; it owns the watches
+                        continue
+                    if running:
+                        if not self.watch_exit(monitor):
+                            # Exited right after the check, look again now
+                            recheck = True
+                            continue
+                        self.watch_log(monitor)
+                        frozen = await self.blocking(monitor.freeze_verdict)
+                        if frozen:
+                            self.request_rejoin(monitor, frozen)
+                    else:
+                        self.request_rejoin(monitor, "Process stopped")
+                except Exception as e:
+                    self.report_error(monitor, e)
+
+            if recheck:
+                continue
+
+            # Woken early by a pidfd when a watched client exits
+            self.state.process_wake.clear()
+            try:
+                await asyncio.wait_for(
+                    self.state.process_wake.wait(), self.PROCESS_CHECK_INTERVAL
+                )
+            except asyncio.TimeoutError:
+                pass
+
+    async def presence_task(self):
+        import asyncio
+
+        while True:
+            now = time.monotonic()
+            due = [
+                m
+                for m in self.active_monitors()
+                if m.next_check_at <= now + FleetSupervisor.BATCH_WINDOW
+            ]
+            monitors = due
+            try:
+                monitors = await self.blocking(
+                    lambda: [m for m in due if m.needs_presence()]
+                )
+                for monitor in due:
+                    if monitor not in monitors:
+                        # Live game traffic stands in for a clean check
+                        monitor.record_check(False)
+                if monitors:
+                    presences = await self.blocking(poll_presence, monitors)
+                    now = time.monotonic()
+                    for monitor in monitors:
+                        monitor.presence_checked_at = now
+                    for monitor in monitors:
+                        presence = presences[monitor.account.user_id]
+                        await self.evaluate(monitor, presence)
+                        if monitor in self.state.rejoining:
+                            continue
+                        reason = await self.blocking(monitor.memory_verdict, presence)
+                        if reason:
+                            self.request_rejoin(monitor, reason)
+            except Exception as e:
+                for monitor in monitors:
+                    self.report_error(monitor, e)
+            now = time.monotonic()
+            for monitor in due:
+                monitor.next_check_at = now + monitor.check_interval
+            # Wake at least every min_interval for clients that finish a rejoin
+            next_due = min(
+                [m.next_check_at for m in self.active_monitors()]
+                + [now + m.min_interval for m in self.state.monitors]
+            )
+            await asyncio.sleep(max(0.0, next_due - now))
+
+    async def evaluate(self, monitor, presence):
+        # A rejoin may have started while the presence request was in flight
+        if monitor in self.state.rejoining:
+            return
+
+        rejoin, reason, current_game_id, universe_id = await self.blocking(
+            should_rejoin,
+            monitor.account.user_id,
+            monitor.expected_game_id,
+            monitor.account.roblox_cookie,
+            monitor.account.package,
+            presence,
+        )
+        if monitor in self.state.rejoining:
+            return
+        if rejoin:
+            self.request_rejoin(monitor, reason, current_game_id)
+            return
+        network_reason = monitor.network_verdict(presence)
+        if network_reason:
+            self.request_rejoin(monitor, network_reason, current_game_id)
+            return
+
+        monitor.record_check(False)
+        # track() may save the state journal (pidof and an fsync)
+        status = await self.blocking(monitor.track, current_game_id)
+        if status:
+            self.status_queue.put_nowait((monitor, status, current_game_id, universe_id))
+
+    async def config_task(self):
+        import asyncio
+
+        while True:
+            await asyncio.sleep(
+                max(0.0, config_watcher.next_check_at - time.monotonic())
+            )
+            # Applied on the loop thread, between two steps of the other tasks
+            try:
+                if config_watcher.changed():
+                    reload_config(self.state.monitors, self.scheduler)
+            except Exception as e:
+                print(f"Error: {e}")
+
+    async def metadata_task(self):
+        while True:
+            reports = [await self.status_queue.get()]
+            while not self.status_queue.empty():
+                reports.append(self.status_queue.get_nowait())
+            try:
+                # One games request covers every queued report
+                await self.blocking(
+                    get_game_names, [universe_id for *_, universe_id in reports]
                 )
+            except Exception as e:
+                pass
+
+            for monitor, status, game_id, universe_id in reports:
+                try:
+                    await self.blocking(
+                        monitor.report_status, status, game_id, universe_id
+                    )
+                except Exception as e:
+                    self.report_error(monitor, e)
 
-                if current_game_id and current_game_id != last_game_id:
-                    game_name = get_game_name(universe_id)
-                    last_game_id = current_game_id
-                    print(f"{status}")
-                    if game_name:
-                        print(f"Game: {game_name}")
-                    discord.notify_status(status, current_game_id, universe_id)
+    async def main(self):
+        import asyncio
 
-            time.sleep(interval)
+        self.loop = asyncio.get_running_loop()
+        self.task = asyncio.current_task()
+        self.state.process_wake = asyncio.Event()
+        self.status_queue = asyncio.Queue()
 
-        except KeyboardInterrupt:
+        resumed = await self.blocking(resume_monitors, self.state.monitors)
+        await asyncio.gather(
+            *(self.launch(m) for m in self.state.monitors if m not in resumed)
+        )
+        print("Monitoring active (Ctrl+C to stop)\n")
+
+        tasks = [self.process_task(), self.presence_task(), self.metadata_task()]
+        if config_watcher.next_check_at < math.inf:
+            tasks.append(self.config_task())
+        await asyncio.gather(*tasks)
+
+    def stop(self):
+        if self.loop is not None:
+            self.loop.call_soon_threadsafe(self.task.cancel)
+
+    def run(self):
+        import asyncio
+
+        try:
+            asyncio.run(self.main())
+        except (KeyboardInterrupt, asyncio.CancelledError):
             print("\nStopped by user\n")
-            break
-        except Exception as e:
-            error_msg = str(e)
-            print(f"Error: {error_msg}")
-            discord.notify_error(error_msg)
-            time.sleep(5)
+        finally:
+            self.logcat.close()
+
 
+def main():
+    if not os.path.exists(".env"):
+        print("Error: .env file not found")
+        print("Run: python setup.py")
+        return
+
+    # Root checks run while the config is loaded and the notifiers start
+    preflight_result = {}
+    preflight_thread = threading.Thread(
+        target=preflight, args=(preflight_result,), name="preflight", daemon=True
+    )
+    preflight_thread.start()
+
+    try:
+        settings = load_settings()
+        load_launch_settings()
+    except ValueError as e:
+        print(f"Error: {e}")
+        return
+    interval = settings["interval"]
+    roblox_cookie = os.getenv("ROBLOX_COOKIE")
+
+    try:
+        accounts = load_accounts(roblox_cookie)
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        print(f"Error: Invalid FLEET_FILE: {e}")
+        return
+
+    try:
+        validate_accounts(accounts)
+    except ValueError as e:
+        print(f"Error: {e}")
+        return
+
+    packages = [account.package for account in accounts]
+
+    system_sampler.watch(packages)
+    system_sampler.start()
+    state_journal.load()
+    config_watcher.start()
+
+    SignalProfiler(
+        int(os.getenv("PROFILE_SECONDS", "30")), os.getenv("PROFILE_DIR", ".")
+    ).install()
+
+    metrics_port = os.getenv("METRICS_PORT", "").strip()
+    if metrics_port:
+        metrics_host = os.getenv("METRICS_HOST", "127.0.0.1")
+        start_metrics_server(metrics_host, int(metrics_port))
+        print(f"Metrics: http://{metrics_host}:{metrics_port}/metrics")
+
+    fleet = len(accounts) > 1
+    monitors = []
+    for account in accounts:
+        prefix = f"[{account.name}] " if fleet else ""
+        discord = DiscordNotifier(account.user_id)
+        monitors.append(
+            AccountMonitor(account, discord, prefix=prefix, **settings)
+        )
+
+    if fleet:
+        print(f"Config: {len(accounts)} accounts, Interval {interval}s")
+    else:
+        print(f"Config: User {accounts[0].user_id}, Interval {interval}s")
+
+    preflight_thread.join()
+    if not preflight_result["root"]:
+        print("Error: Root access required")
+        return
+
+    if os.getenv("ENGINE", "sync").lower() == "async":
+        print(f"Initializing...")
+        AsyncEngine(monitors).run()
+        return
+
+    supervisor = FleetSupervisor(monitors)
+    if not supervisor.start():
+        print("Error: Failed to open Roblox")
+        return
+
+    print(f"Initializing...")
+    supervisor.run()
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -1,15 +1,231 @@
 import os
+import json
+import asyncio
 import time
+import random
 import psutil
+import threading
 import subprocess
 import webbrowser
+import http.cookiejar
 import requests
+import requests.adapters
+from collections import OrderedDict, deque
 from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
 from dotenv import load_dotenv
 
 load_dotenv()
 
 ROBLOX_PROCESS_NAMES = ["RobloxPlayerBeta.exe", "RobloxPlayer.exe"]
+JOIN_POLL_INITIAL = 5.0
+JOIN_POLL_MAX = 15.0
+JOIN_POLL_BACKOFF = 1.5
+
+
+class SystemSampler:
+    def __init__(self, process_names, interval=5.0, window=12):
+        self.process_names = set(process_names)
+        self.interval = interval
+        self.samples = deque(maxlen=window)
+        self.processes = {}
+        self.latest = None
+        self.lock = threading.Lock()
+        self.thread = None
+
+    def watch(self, process_names):
+        with self.lock:
+            self.process_names = set(process_names)
+            self.processes = {}
+
+    def start(self):
+        if self.thread is None:
+            self.thread = threading.Thread(
+                target=self.run, name="system-sampler", daemon=True
+            )
+            self.thread.start()
+
+    def run(self):
+        while True:
+            try:
+                self.sample()
+            except Exception as e:
+                pass
+            time.sleep(self.interval)
+
+    def find_processes(self):
+        for proc in psutil.process_iter(["pid", "name", "cmdline"]):
+            try:
+                cmdline = proc.info["cmdline"] or [""]
+                if (
+                    proc.info["name"] in self.process_names
+                    or cmdline[0] in self.process_names
+                ):
+                    # Prime cpu_percent so the next call measures a real interval
+                    proc.cpu_percent(None)
+                    self.processes[proc.pid] = proc
+            except (psutil.NoSuchProcess, psutil.AccessDenied, IndexError):
+                continue
+
+    def sample_processes(self):
+        if not self.processes:
+            self.find_processes()
+
+        cpu_percent = 0.0
+        rss = 0
+        for pid, proc in list(self.processes.items()):
+            try:
+                cpu_percent += proc.cpu_percent(None)
+                rss += proc.memory_info().rss
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                del self.processes[pid]
+        return cpu_percent, rss
+
+    def sample(self):
+        # Non-blocking: measures CPU time since the previous sample
+        try:
+            cpu_percent = psutil.cpu_percent(interval=None)
+        except Exception:
+            cpu_percent = 0.0
+        ram = psutil.virtual_memory()
+
+        with self.lock:
+            roblox_cpu, roblox_rss = self.sample_processes()
+            self.samples.append(
+                (cpu_percent, ram.percent, ram.used, roblox_cpu, roblox_rss)
+            )
+            count = len(self.samples)
+            averages = [sum(column) / count for column in zip(*self.samples)]
+
+            self.latest = {
+                "cpu_percent": round(averages[0], 1),
+                "ram_percent": round(averages[1], 1),
+                "ram_used_gb": round(averages[2] / (1024**3), 2),
+                "ram_total_gb": round(ram.total / (1024**3), 2),
+                "roblox_processes": len(self.processes),
+                "roblox_cpu_percent": round(averages[3], 1),
+                "roblox_rss_mb": round(averages[4] / (1024**2), 1),
+            }
+
+    def snapshot(self):
+        if self.latest is None:
+            self.sample()
+        return self.latest
+
+
+system_sampler = SystemSampler(
+    ROBLOX_PROCESS_NAMES,
+    float(os.getenv("SYSTEM_SAMPLE_INTERVAL", "5")),
+)
+
+
+class PendingEmbed:
+    def __init__(self, notifier, key, title, description, color, fields, show_user_info):
+        self.notifier = notifier
+        # Queued embeds sharing a key are merged, keeping only the newest
+        self.key = (id(notifier), key) if key else None
+        self.title = title
+        self.description = description
+        self.color = color
+        self.fields = fields
+        self.show_user_info = show_user_info
+        self.timestamp = datetime.now(timezone.utc).isoformat()
+
+
+class WebhookDispatcher:
+    MAX_EMBEDS = 10
+    MAX_RETRIES = 3
+    BATCH_WINDOW = 1.0
+
+    def __init__(self, webhook_url, webhook_name):
+        self.webhook_url = webhook_url
+        self.webhook_name = webhook_name
+        self.max_pending = int(os.getenv("DISCORD_QUEUE_SIZE", "50"))
+        self.pending = []
+        self.cond = threading.Condition()
+        self.session = requests.Session()
+        self.thread = threading.Thread(
+            target=self.run, name="discord-webhook", daemon=True
+        )
+        self.thread.start()
+
+    def submit(self, item):
+        with self.cond:
+            if item.key:
+                for i, queued in enumerate(self.pending):
+                    if queued.key == item.key:
+                        self.pending[i] = item
+                        return
+            if len(self.pending) >= self.max_pending:
+                self.drop_oldest()
+            self.pending.append(item)
+            self.cond.notify()
+
+    def drop_oldest(self):
+        # Status updates go first, they are superseded by the next one anyway
+        for i, queued in enumerate(self.pending):
+            if queued.key:
+                del self.pending[i]
+                return
+        del self.pending[0]
+
+    def next_batch(self):
+        with self.cond:
+            while not self.pending:
+                self.cond.wait()
+        # Give a burst of notifications time to land in the same message
+        time.sleep(self.BATCH_WINDOW)
+        with self.cond:
+            batch = self.pending[: self.MAX_EMBEDS]
+            del self.pending[: self.MAX_EMBEDS]
+        return batch
+
+    def run(self):
+        while True:
+            batch = self.next_batch()
+            try:
+                self.deliver(batch)
+            except Exception as e:
+                pass
+
+    def retry_after(self, response):
+        try:
+            return float(response.json().get("retry_after", 1.0))
+        except (ValueError, AttributeError):
+            return float(response.headers.get("Retry-After", 1.0))
+
+    def deliver(self, batch):
+        system_info = batch[0].notifier.get_system_info()
+        embeds = [item.notifier.build_embed(item, system_info) for item in batch]
+        payload = {"username": self.webhook_name, "embeds": embeds}
+
+        contents = []
+        for item in batch:
+            content = item.notifier.payload_content()
+            if content and content not in contents:
+                contents.append(content)
+        if contents:
+            payload["content"] = " ".join(contents)
+
+        for _ in range(self.MAX_RETRIES):
+            r = self.session.post(self.webhook_url, json=payload, timeout=5)
+            if r.status_code != 429:
+                return r.status_code < 300
+            time.sleep(self.retry_after(r))
+        return False
+
+
+webhook_dispatchers = {}
+webhook_dispatchers_lock = threading.Lock()
+
+
+def get_webhook_dispatcher(webhook_url, webhook_name):
+    with webhook_dispatchers_lock:
+        key = (webhook_url, webhook_name)
+        if key not in webhook_dispatchers:
+            webhook_dispatchers[key] = WebhookDispatcher(webhook_url, webhook_name)
+        return webhook_dispatchers[key]
 
 
 class DiscordNotifier:
@@ -31,6 +247,7 @@ class DiscordNotifier:
         self.notify_on_error = (
             os.getenv("DISCORD_NOTIFY_ON_ERROR", "true").lower() == "true"
         )
+        self.dispatcher = None
         self.user_id = user_id
         self.username, self.display_name = get_user_info(user_id)
         self.avatar_url = get_user_avatar(user_id) if self.username else None
@@ -47,27 +264,40 @@ class DiscordNotifier:
             return self.mention_user
 
     def get_system_info(self):
-        cpu_percent = psutil.cpu_percent(interval=1)
-        ram = psutil.virtual_memory()
-        ram_percent = ram.percent
-        ram_used_gb = ram.used / (1024**3)
-        ram_total_gb = ram.total / (1024**3)
-
-        return {
-            "cpu_percent": cpu_percent,
-            "ram_percent": ram_percent,
-            "ram_used_gb": round(ram_used_gb, 2),
-            "ram_total_gb": round(ram_total_gb, 2),
-        }
+        try:
+            return system_sampler.snapshot()
+        except Exception as e:
+            print(f"Warning: Failed to get system info: {e}")
+            return {
+                "cpu_percent": 0.0,
+                "ram_percent": 0.0,
+                "ram_used_gb": 0.0,
+                "ram_total_gb": 0.0,
+                "roblox_processes": 0,
+                "roblox_cpu_percent": 0.0,
+                "roblox_rss_mb": 0.0,
+            }
 
-    def send_embed(self, title, description, color, fields=None, show_user_info=True):
+    def send_embed(
+        self, title, description, color, fields=None, show_user_info=True, key=None
+    ):
         if not self.enabled:
             return False
 
-        system_info = self.get_system_info()
+        if self.dispatcher is None:
+            self.dispatcher = get_webhook_dispatcher(
+                self.webhook_url, self.webhook_name
+            )
+        self.dispatcher.submit(
+            PendingEmbed(self, key, title, description, color, fields, show_user_info)
+        )
+        return True
+
+    def payload_content(self):
+        return self.format_mention() or None
 
-        if not fields:
-            fields = []
+    def build_embed(self, item, system_info):
+        fields = list(item.fields or [])
 
         fields.append(
             {
@@ -83,33 +313,31 @@ class DiscordNotifier:
                 "inline": True,
             }
         )
+        if system_info["roblox_processes"]:
+            fields.append(
+                {
+                    "name": "Roblox Usage",
+                    "value": f"{system_info['roblox_cpu_percent']}% CPU, {system_info['roblox_rss_mb']} MB RAM",
+                    "inline": True,
+                }
+            )
 
         embed = {
-            "title": title,
-            "description": description,
-            "color": color,
-            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "title": item.title,
+            "description": item.description,
+            "color": item.color,
+            "timestamp": item.timestamp,
             "footer": {"text": self.webhook_name},
             "fields": fields,
         }
 
-        if show_user_info and self.username:
+        if item.show_user_info and self.username:
             embed["author"] = {
                 "name": f"{self.display_name} (@{self.username})",
                 "icon_url": self.avatar_url,
             }
 
-        payload = {"username": self.webhook_name, "embeds": [embed]}
-
-        mention = self.format_mention()
-        if mention:
-            payload["content"] = mention
-
-        try:
-            requests.post(self.webhook_url, json=payload, timeout=5)
-            return True
-        except:
-            return False
+        return embed
 
     def notify_start(self, user_id, check_interval):
         if not self.notify_on_start:
@@ -156,7 +384,7 @@ class DiscordNotifier:
         title = "Status Update"
         description = f"Current status: **{status}**"
 
-        self.send_embed(title, description, color, fields)
+        self.send_embed(title, description, color, fields, key="status")
 
     def notify_error(self, error):
         if not self.notify_on_error:
@@ -164,20 +392,87 @@ class DiscordNotifier:
         self.send_embed("Error Occurred", f"```{error}```", 16711680)
 
 
-def find_roblox_process():
-    for proc in psutil.process_iter(["pid", "name"]):
+class ProcessLocator:
+    def __init__(self, process_names):
+        self.process_names = process_names
+        self.proc = None
+
+    def is_alive(self):
+        # psutil compares the creation time, so a reused PID is not mistaken
+        # for the process we remembered
         try:
-            if proc.info["name"] in ROBLOX_PROCESS_NAMES:
-                return proc
+            return (
+                self.proc is not None
+                and self.proc.is_running()
+                and self.proc.status() != psutil.STATUS_ZOMBIE
+                and self.proc.name() in self.process_names
+            )
         except (psutil.NoSuchProcess, psutil.AccessDenied):
-            continue
-    return None
+            return False
+
+    def scan(self):
+        for proc in psutil.process_iter(["pid", "name"]):
+            try:
+                if proc.info["name"] in self.process_names:
+                    return proc
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                continue
+        return None
+
+    def locate(self):
+        if not self.is_alive():
+            # Full scan only once the remembered process is gone
+            self.proc = self.scan()
+        return self.proc
+
+
+process_locator = ProcessLocator(ROBLOX_PROCESS_NAMES)
+
+
+def find_roblox_process():
+    return process_locator.locate()
 
 
 def is_roblox_running():
     return find_roblox_process() is not None
 
 
+class HangDetector:
+    def __init__(self, timeout):
+        self.timeout = timeout
+        self.proc = None
+        self.cpu_time = None
+        self.progress_at = None
+
+    def sample(self, proc):
+        now = time.monotonic()
+        if proc != self.proc:
+            self.proc = proc
+            self.cpu_time = None
+            self.progress_at = now
+        if proc is None or not self.timeout:
+            return False
+
+        try:
+            times = proc.cpu_times()
+            status = proc.status()
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            return False
+        # A main thread stuck in uninterruptible sleep is not progress
+        cpu_time = times.user + times.system
+        if cpu_time != self.cpu_time and status != psutil.STATUS_DISK_SLEEP:
+            self.progress_at = now
+        self.cpu_time = cpu_time
+        return now - self.progress_at >= self.timeout
+
+
+hang_detector = HangDetector(int(os.getenv("FREEZE_TIMEOUT", "120")))
+
+
+def is_roblox_frozen():
+    return hang_detector.sample(find_roblox_process())
+
+
 def kill_roblox():
     killed = False
     for proc in psutil.process_iter(["pid", "name"]):
@@ -203,17 +498,218 @@ def open_private_server(link):
         return False
 
 
+class TokenBucket:
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.lock = threading.Lock()
+
+    def acquire(self, wait_blocked=True):
+        # Returns False instead of waiting out a Retry-After block if asked to
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                if not wait_blocked and now < self.blocked_until:
+                    return False
+                self.tokens = min(
+                    self.capacity, self.tokens + (now - self.updated) * self.rate
+                )
+                self.updated = now
+                if now >= self.blocked_until and self.tokens >= 1:
+                    self.tokens -= 1
+                    return True
+                wait = max(self.blocked_until - now, (1 - self.tokens) / self.rate)
+            time.sleep(wait)
+
+    def block(self, seconds):
+        with self.lock:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+
+class RobloxAPI:
+    USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+    MAX_RETRIES = 3
+    MAX_BACKOFF = 60.0
+
+    def __init__(self):
+        self.rate = float(os.getenv("ROBLOX_API_RATE", "5"))
+        self.burst = int(os.getenv("ROBLOX_API_BURST", "10"))
+        self.buckets = {}
+        self.lock = threading.Lock()
+
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=8, pool_maxsize=8)
+        self.session.mount("https://", adapter)
+        self.session.headers.update(
+            {"User-Agent": self.USER_AGENT, "Accept": "application/json"}
+        )
+        # Cookies are passed per request; never let a response cookie leak
+        # into requests made for another account
+        self.session.cookies.set_policy(
+            http.cookiejar.DefaultCookiePolicy(allowed_domains=[])
+        )
+
+    def bucket(self, host):
+        with self.lock:
+            if host not in self.buckets:
+                self.buckets[host] = TokenBucket(self.rate, self.burst)
+            return self.buckets[host]
+
+    def retry_delay(self, response, attempt):
+        retry_after = response.headers.get("Retry-After")
+        if retry_after:
+            try:
+                return min(float(retry_after), self.MAX_BACKOFF)
+            except ValueError:
+                try:
+                    retry_at = parsedate_to_datetime(retry_after)
+                    delay = (retry_at - datetime.now(timezone.utc)).total_seconds()
+                    return min(max(delay, 0.0), self.MAX_BACKOFF)
+                except (TypeError, ValueError):
+                    pass
+        return min(2**attempt + random.random(), self.MAX_BACKOFF)
+
+    def request(self, method, url, retry=True, **kwargs):
+        # retry=False fails fast for callers that must not stall (presence):
+        # one attempt, and None while the host is blocked by a 429
+        kwargs.setdefault("timeout", 10)
+        bucket = self.bucket(urlsplit(url).netloc)
+        attempts = self.MAX_RETRIES + 1 if retry else 1
+
+        for attempt in range(attempts):
+            if not bucket.acquire(wait_blocked=retry):
+                return None
+            response = self.session.request(method, url, **kwargs)
+            if response.status_code != 429 and response.status_code < 500:
+                return response
+            delay = self.retry_delay(response, attempt)
+            if response.status_code == 429:
+                # Throttling applies to the whole host, not just this call
+                bucket.block(delay)
+            if attempt == attempts - 1:
+                break
+            if response.status_code != 429:
+                time.sleep(delay)
+
+        return response
+
+    def get_json(self, url, **kwargs):
+        r = self.request("GET", url, **kwargs)
+        if r is not None and r.status_code == 200:
+            return r.json()
+        return None
+
+    def post_json(self, url, **kwargs):
+        r = self.request("POST", url, **kwargs)
+        if r is not None and r.status_code == 200:
+            return r.json()
+        return None
+
+
+roblox_api = RobloxAPI()
+
+
+class TTLCache:
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        key = str(key)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.time():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        key = str(key)
+        with self.lock:
+            self.entries[key] = (time.time() + self.ttl, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def dump(self):
+        now = time.time()
+        with self.lock:
+            return [
+                [key, expires_at, value]
+                for key, (expires_at, value) in self.entries.items()
+                if expires_at > now
+            ]
+
+    def restore(self, items):
+        now = time.time()
+        with self.lock:
+            for key, expires_at, value in items:
+                if expires_at > now:
+                    self.entries[str(key)] = (expires_at, value)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+
+class MetadataCache:
+    def __init__(self, path, ttl, max_size=512):
+        self.path = path
+        self.games = TTLCache(max_size, ttl)
+        self.users = TTLCache(max_size, ttl)
+        self.avatars = TTLCache(max_size, ttl)
+        self.lock = threading.Lock()
+
+    def tables(self):
+        return {"games": self.games, "users": self.users, "avatars": self.avatars}
+
+    def load(self):
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+            for name, table in self.tables().items():
+                table.restore(data.get(name, []))
+        except (OSError, ValueError, TypeError):
+            pass
+
+    def save(self):
+        data = {name: table.dump() for name, table in self.tables().items()}
+        tmp_path = f"{self.path}.tmp"
+        with self.lock:
+            try:
+                with open(tmp_path, "w") as f:
+                    json.dump(data, f)
+                os.replace(tmp_path, self.path)
+            except OSError:
+                pass
+
+
+metadata_cache = MetadataCache(
+    os.getenv("METADATA_CACHE_FILE", ".metadata_cache.json"),
+    int(os.getenv("METADATA_CACHE_TTL", "86400")),
+)
+metadata_cache.load()
+
+
 def get_user_info(user_id):
-    url = f"https://users.roblox.com/v1/users/{user_id}"
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
-    }
+    cached = metadata_cache.users.get(user_id)
+    if cached:
+        return tuple(cached)
 
     try:
-        r = requests.get(url, headers=headers, timeout=10)
-        if r.status_code == 200:
-            data = r.json()
-            return data.get("name"), data.get("displayName")
+        data = roblox_api.get_json(f"https://users.roblox.com/v1/users/{user_id}")
+        if data:
+            user_info = (data.get("name"), data.get("displayName"))
+            metadata_cache.users.set(user_id, list(user_info))
+            metadata_cache.save()
+            return user_info
     except Exception as e:
         pass
 
@@ -221,6 +717,10 @@ def get_user_info(user_id):
 
 
 def get_user_avatar(user_id):
+    cached = metadata_cache.avatars.get(user_id)
+    if cached:
+        return cached
+
     url = "https://thumbnails.roblox.com/v1/users/avatar-headshot"
     params = {
         "userIds": user_id,
@@ -228,18 +728,17 @@ def get_user_avatar(user_id):
         "format": "Png",
         "isCircular": True,
     }
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
-        "Accept": "application/json",
-    }
 
     try:
-        r = requests.get(url, params=params, headers=headers, timeout=10)
-        if r.status_code == 200:
-            data = r.json()
+        data = roblox_api.get_json(url, params=params)
+        if data:
             images = data.get("data", [])
             if images:
-                return images[0].get("imageUrl")
+                avatar_url = images[0].get("imageUrl")
+                if avatar_url:
+                    metadata_cache.avatars.set(user_id, avatar_url)
+                    metadata_cache.save()
+                return avatar_url
     except Exception as e:
         pass
 
@@ -247,20 +746,26 @@ def get_user_avatar(user_id):
 
 
 def get_game_name(universe_id):
+    if not universe_id:
+        return None
+
+    cached = metadata_cache.games.get(universe_id)
+    if cached:
+        return cached
+
     url = "https://games.roblox.com/v1/games"
     params = {"universeIds": universe_id}
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
-        "Accept": "application/json",
-    }
 
     try:
-        r = requests.get(url, params=params, headers=headers, timeout=10)
-        if r.status_code == 200:
-            data = r.json()
+        data = roblox_api.get_json(url, params=params)
+        if data:
             games = data.get("data", [])
             if games:
-                return games[0].get("name")
+                game_name = games[0].get("name")
+                if game_name:
+                    metadata_cache.games.set(universe_id, game_name)
+                    metadata_cache.save()
+                return game_name
     except Exception as e:
         pass
 
@@ -270,21 +775,15 @@ def get_game_name(universe_id):
 def check_user_presence(user_id, roblox_cookie=None):
     url = "https://presence.roblox.com/v1/presence/users"
     payload = {"userIds": [user_id]}
-    headers = {
-        "Content-Type": "application/json",
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
-    }
 
     cookies = {}
     if roblox_cookie:
         cookies[".ROBLOSECURITY"] = roblox_cookie
 
     try:
-        r = requests.post(
-            url, json=payload, headers=headers, cookies=cookies, timeout=10
-        )
-        if r.status_code == 200:
-            data = r.json()
+        # A throttled host skips this check instead of stalling the monitor
+        data = roblox_api.post_json(url, retry=False, json=payload, cookies=cookies)
+        if data:
             user_presences = data.get("userPresences", [])
             if user_presences:
                 presence = user_presences[0]
@@ -303,6 +802,9 @@ def should_rejoin(user_id, expected_game_id, roblox_cookie=None):
     if not is_roblox_running():
         return True, "Process stopped", None, None
 
+    if is_roblox_frozen():
+        return True, "Client frozen", None, None
+
     is_ingame, current_game_id, universe_id = check_user_presence(user_id, roblox_cookie)
 
     if not is_ingame:
@@ -314,16 +816,184 @@ def should_rejoin(user_id, expected_game_id, roblox_cookie=None):
     return False, "OK", current_game_id, universe_id
 
 
+def wait_for_join(user_id, roblox_cookie, timeout, leaving_game_id=None):
+    # Poll early and back off, returning as soon as presence shows a game
+    deadline = time.monotonic() + timeout
+    delay = JOIN_POLL_INITIAL
+    presence = (True, None, None)
+
+    while True:
+        time.sleep(max(0.0, min(delay, deadline - time.monotonic())))
+        presence = check_user_presence(user_id, roblox_cookie)
+        is_ingame, game_id, _ = presence
+        # Presence can lag behind; never confirm a join on the server we left
+        if game_id == leaving_game_id:
+            presence = (is_ingame, None, None)
+        elif is_ingame and game_id:
+            return presence
+        if time.monotonic() >= deadline:
+            return presence
+        delay = min(delay * JOIN_POLL_BACKOFF, JOIN_POLL_MAX)
+
+
+class MonitorState:
+    def __init__(self, expected_game_id):
+        self.expected_game_id = expected_game_id
+        self.last_game_id = None
+        self.rejoining = False
+
+
+class AsyncMonitor:
+    PROCESS_CHECK_INTERVAL = 2.0
+
+    def __init__(
+        self, state, discord, user_id, ps_link, roblox_cookie, interval, join_timeout
+    ):
+        self.state = state
+        self.discord = discord
+        self.user_id = user_id
+        self.ps_link = ps_link
+        self.roblox_cookie = roblox_cookie
+        self.interval = interval
+        self.join_timeout = join_timeout
+        self.status_queue = None
+        self.loop = None
+
+    def blocking(self, func, *args):
+        return self.loop.run_in_executor(None, func, *args)
+
+    def report_error(self, error):
+        error_msg = str(error)
+        print(f"Error: {error_msg}")
+        self.discord.notify_error(error_msg)
+
+    def request_rejoin(self, reason, current_game_id=None):
+        if self.state.rejoining:
+            return
+        self.state.rejoining = True
+        asyncio.ensure_future(self.rejoin(reason, current_game_id))
+
+    async def rejoin(self, reason, current_game_id):
+        try:
+            print(f"{reason} - Rejoining...")
+            self.discord.notify_rejoin(reason, current_game_id)
+
+            await self.blocking(kill_roblox)
+            await asyncio.sleep(2)
+            await self.blocking(open_private_server, self.ps_link)
+            _, new_game_id, new_universe_id = await self.blocking(
+                wait_for_join,
+                self.user_id,
+                self.roblox_cookie,
+                self.join_timeout,
+                current_game_id if reason == "Server switched" else None,
+            )
+
+            if new_game_id:
+                self.state.expected_game_id = new_game_id
+                self.state.last_game_id = new_game_id
+                new_game_name = await self.blocking(get_game_name, new_universe_id)
+                print("Rejoined successfully")
+                if new_game_name:
+                    print(f"Game: {new_game_name}")
+                print()
+                self.discord.notify_status("Rejoined", new_game_id, new_universe_id)
+            else:
+                print("Rejoined (Game ID unavailable)\n")
+                self.state.last_game_id = None
+        except Exception as e:
+            self.report_error(e)
+        finally:
+            self.state.rejoining = False
+
+    async def process_task(self):
+        while True:
+            try:
+                if not self.state.rejoining:
+                    running = await self.blocking(is_roblox_running)
+                    if not running:
+                        self.request_rejoin("Process stopped")
+                    elif await self.blocking(is_roblox_frozen):
+                        self.request_rejoin("Client frozen")
+            except Exception as e:
+                self.report_error(e)
+            await asyncio.sleep(self.PROCESS_CHECK_INTERVAL)
+
+    async def presence_task(self):
+        while True:
+            try:
+                if not self.state.rejoining:
+                    presence = await self.blocking(
+                        check_user_presence, self.user_id, self.roblox_cookie
+                    )
+                    self.evaluate(presence)
+            except Exception as e:
+                self.report_error(e)
+            await asyncio.sleep(self.interval)
+
+    def evaluate(self, presence):
+        # A rejoin may have started while the presence request was in flight
+        if self.state.rejoining:
+            return
+
+        is_ingame, current_game_id, universe_id = presence
+        expected_game_id = self.state.expected_game_id
+
+        if not is_ingame:
+            self.request_rejoin("Not in-game", current_game_id)
+            return
+        if expected_game_id and current_game_id and current_game_id != expected_game_id:
+            self.request_rejoin("Server switched", current_game_id)
+            return
+
+        if current_game_id and current_game_id != self.state.last_game_id:
+            self.state.last_game_id = current_game_id
+            status = (
+                "In-Game"
+                if expected_game_id and current_game_id == expected_game_id
+                else "In-Game (Unknown server)"
+            )
+            self.status_queue.put_nowait((status, current_game_id, universe_id))
+
+    async def status_task(self):
+        while True:
+            status, game_id, universe_id = await self.status_queue.get()
+            try:
+                game_name = await self.blocking(get_game_name, universe_id)
+                print(f"{status}")
+                if game_name:
+                    print(f"Game: {game_name}")
+                self.discord.notify_status(status, game_id, universe_id)
+            except Exception as e:
+                self.report_error(e)
+
+    async def main(self):
+        self.loop = asyncio.get_running_loop()
+        self.status_queue = asyncio.Queue()
+        await asyncio.gather(
+            self.process_task(), self.presence_task(), self.status_task()
+        )
+
+    def run(self):
+        try:
+            asyncio.run(self.main())
+        except KeyboardInterrupt:
+            print("\nStopped by user\n")
+
+
 def main():
     if not os.path.exists(".env"):
         print("Error: .env file not found")
         print("Run: python setup.py")
         return
 
+    system_sampler.start()
+
     ps_link = os.getenv("PS_LINK")
     user_id = os.getenv("USER_ID")
     interval = int(os.getenv("CHECK_INTERVAL", "30"))
     restart_delay = int(os.getenv("RESTART_DELAY", "15"))
+    join_timeout = int(os.getenv("JOIN_TIMEOUT", str(restart_delay * 4)))
     roblox_cookie = os.getenv("ROBLOX_COOKIE")
 
     discord = DiscordNotifier(user_id)
@@ -355,10 +1025,9 @@ def main():
 
     print(f"Initializing...")
     print("(Roblox should open in your browser and launch the game)")
-    time.sleep(restart_delay * 2)
+    _, private_game_id, _ = wait_for_join(user_id, roblox_cookie, join_timeout)
 
     print()
-    _, private_game_id, _ = check_user_presence(user_id, roblox_cookie)
 
     if private_game_id:
         print(f"Game ID: {private_game_id[:12]}...")
@@ -367,6 +1036,13 @@ def main():
 
     discord.notify_start(user_id, interval)
 
+    if os.getenv("ENGINE", "sync").lower() == "async":
+        state = MonitorState(private_game_id)
+        AsyncMonitor(
+            state, discord, user_id, ps_link, roblox_cookie, interval, join_timeout
+        ).run()
+        return
+
     expected_game_id = private_game_id
     last_game_id = None
     last_game_name = None
@@ -386,9 +1062,12 @@ def main():
                 kill_roblox()
                 time.sleep(2)
                 open_private_server(ps_link)
-                time.sleep(restart_delay * 2)
-
-                _, new_game_id, new_universe_id = check_user_presence(user_id, roblox_cookie)
+                _, new_game_id, new_universe_id = wait_for_join(
+                    user_id,
+                    roblox_cookie,
+                    join_timeout,
+                    current_game_id if reason == "Server switched" else None,
+                )
                 if new_game_id:
                     expected_game_id = new_game_id
                     new_game_name = get_game_name(new_universe_id)
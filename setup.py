@@ -1,11 +1,13 @@
 #!/usr/bin/env python3
+import argparse
+import csv
+import json
 import os
 import sqlite3
 import subprocess
 import requests
 import re
-import tempfile
-from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional, Tuple, Dict, List
 from dotenv import load_dotenv
 
@@ -25,6 +27,12 @@ WEBVIEW_COOKIE_PATHS = [
 
 ROBLOX_COOKIE_NAME = ".ROBLOSECURITY"
 
+ROBLOX_PACKAGE = "com.roblox.client"
+AUTHENTICATED_USER_URL = "https://users.roblox.com/v1/users/authenticated"
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+DEFAULT_BATCH_WORKERS = 8
+DEFAULT_BATCH_OUTPUT = "accounts"
+
 
 def validate_url(url: str) -> bool:
     """Validate if a string is a properly formatted URL."""
@@ -81,23 +89,6 @@ def get_yes_no_input(prompt: str, default: bool = True) -> bool:
     return user_input != "n"
 
 
-@contextmanager
-def temp_database_path(suffix: str = ".db"):
-    """Context manager for temporary database files."""
-    temp_file = None
-    try:
-        temp_file = tempfile.NamedTemporaryFile(suffix=suffix, delete=False)
-        temp_path = temp_file.name
-        temp_file.close()
-        yield temp_path
-    finally:
-        if temp_file and os.path.exists(temp_path):
-            try:
-                os.remove(temp_path)
-            except OSError:
-                pass
-
-
 def check_root() -> bool:
     """Check if the script has root access via su."""
     try:
@@ -137,72 +128,91 @@ def find_installed_app() -> Dict[str, str]:
     return installed
 
 
-def find_cookie_databases(package_name: str) -> List[str]:
-    """Find cookie database files for Roblox app WebView."""
-    base_path = f"/data/data/{package_name}"
-    found_paths = []
+def read_cookie_databases(package_names: List[str]) -> List[Tuple[str, bytes]]:
+    """Read every WebView cookie database of the given apps with one su call.
 
-    for path in WEBVIEW_COOKIE_PATHS:
-        full_path = f"{base_path}/{path}"
-        if "*" in full_path:
-            success, output = run_shell_cmd(f"ls {full_path} 2>/dev/null")
-            if success and output:
-                for line in output.split("\n"):
-                    if line.strip():
-                        found_paths.append(line.strip())
-        else:
-            success, _ = run_shell_cmd(f'test -f {full_path} && echo "exists"')
-            if success:
-                found_paths.append(full_path)
-
-    return found_paths
-
-
-def copy_database(db_path: str, temp_path: str) -> bool:
-    """Copy database file from protected path to accessible location."""
+    Each existing file is written to stdout as a "<size> <path>" line followed
+    by exactly <size> bytes (padded with zeros if it shrank meanwhile), so the
+    databases never touch temporary storage.
+    """
+    paths = " ".join(
+        f"/data/data/{package}/{path}"
+        for package in package_names
+        for path in WEBVIEW_COOKIE_PATHS
+    )
+    script = (
+        f"for f in {paths}; do [ -f \"$f\" ] || continue; "
+        f"s=$(wc -c < \"$f\"); echo \"$s $f\"; "
+        f"{{ cat \"$f\"; head -c \"$s\" /dev/zero; }} | head -c \"$s\"; done"
+    )
     try:
-        success, _ = run_shell_cmd(f'cp "{db_path}" "{temp_path}"')
-        if not success:
-            return False
-        run_shell_cmd(f'chmod 666 "{temp_path}"')
-        return True
+        result = subprocess.run(["su", "-c", script], capture_output=True, timeout=30)
     except (subprocess.TimeoutExpired, FileNotFoundError, PermissionError, OSError):
-        return False
-
-
-def extract_cookie_from_webview(db_path: str) -> Optional[str]:
-    """Extract Roblox cookie from Roblox app WebView database."""
-    with temp_database_path("_cookies_webview.db") as temp_db:
-        if not copy_database(db_path, temp_db):
-            return None
-
+        return []
+
+    databases = []
+    output = result.stdout
+    position = 0
+    while position < len(output):
+        line_end = output.find(b"\n", position)
+        if line_end < 0:
+            break
         try:
-            conn = sqlite3.connect(temp_db)
-            cursor = conn.cursor()
-
+            size, path = output[position:line_end].decode().split(" ", 1)
+            size = int(size)
+        except ValueError:
+            break
+        position = line_end + 1
+        databases.append((path, output[position : position + size]))
+        position += size
+    return databases
+
+
+def extract_cookie_from_databases(
+    databases: List[Tuple[str, bytes]]
+) -> Tuple[Optional[str], Optional[str]]:
+    """Find the Roblox cookie in in-memory copies of WebView cookie databases.
+
+    Returns the cookie and the path of the database it came from.
+    """
+    conn = sqlite3.connect(":memory:")
+    try:
+        selects = []
+        for index, (path, data) in enumerate(databases):
+            data = bytearray(data)
+            if len(data) >= 20 and data[18:20] == b"\x02\x02":
+                # WAL databases can't be opened in memory; read them as rollback
+                data[18:20] = b"\x01\x01"
+            schema = f"db{index}"
             try:
-                cursor.execute("""
-                    SELECT name, value, host_key 
-                    FROM cookies 
-                    WHERE (host_key LIKE '%roblox.com%' OR host_key LIKE '%www.roblox.com%')
-                    AND name = ?
-                """, (ROBLOX_COOKIE_NAME,))
-                result = cursor.fetchone()
-            except sqlite3.OperationalError:
-                cursor.execute("""
-                    SELECT name, value 
-                    FROM cookies 
-                    WHERE name = ?
-                """, (ROBLOX_COOKIE_NAME,))
-                result = cursor.fetchone()
-
-            conn.close()
-
-            if result:
-                return result[1] if len(result) > 1 else result[0]
-            return None
-        except (sqlite3.Error, OSError, IndexError):
-            return None
+                conn.execute(f"ATTACH DATABASE ':memory:' AS {schema}")
+                conn.deserialize(bytes(data), name=schema)
+                columns = [
+                    row[1]
+                    for row in conn.execute(f"PRAGMA {schema}.table_info(cookies)")
+                ]
+            except sqlite3.Error:
+                continue
+            if "value" not in columns:
+                continue
+            query = f"SELECT value, {index} FROM {schema}.cookies WHERE name = :name"
+            if "host_key" in columns:
+                query += " AND host_key LIKE '%roblox.com%'"
+            selects.append(query)
+
+        if not selects:
+            return None, None
+        result = conn.execute(
+            " UNION ALL ".join(selects), {"name": ROBLOX_COOKIE_NAME}
+        ).fetchall()
+        for value, index in result:
+            if value:
+                return value, databases[index][0]
+        return None, None
+    except sqlite3.Error:
+        return None, None
+    finally:
+        conn.close()
 
 
 def auto_extract_cookie() -> Optional[str]:
@@ -219,44 +229,59 @@ def auto_extract_cookie() -> Optional[str]:
         print("You'll need to enter cookie manually\n")
         return None
 
-    for app_name, package_name in installed_apps.items():
-        print(f"Checking {app_name} for cookie...")
-
-        db_paths = find_cookie_databases(package_name)
-
-        if not db_paths:
-            continue
-
-        for db_path in db_paths:
-            cookie = extract_cookie_from_webview(db_path)
-
-            if cookie:
-                print(f"Cookie found in {app_name}!")
-                print(f"Cookie extracted successfully ({len(cookie)} characters)\n")
-                return cookie
+    print(f"Checking {', '.join(installed_apps)} for cookie...")
+    databases = read_cookie_databases(list(installed_apps.values()))
+    cookie, db_path = extract_cookie_from_databases(databases)
+
+    if cookie:
+        app_name = next(
+            (
+                name
+                for name, package in installed_apps.items()
+                if db_path.startswith(f"/data/data/{package}/")
+            ),
+            next(iter(installed_apps)),
+        )
+        print(f"Cookie found in {app_name}!")
+        print(f"Cookie extracted successfully ({len(cookie)} characters)\n")
+        return cookie
 
     print("Cookie not found automatically")
     print("You'll need to enter cookie manually\n")
     return None
 
 
+def fetch_authenticated_user(
+    cookie: str, session=None
+) -> Tuple[Optional[int], Optional[int], Optional[str]]:
+    """Look up the account a cookie belongs to.
+
+    Returns the HTTP status (None if the request failed), user ID and username.
+    """
+    headers = {
+        "Cookie": f".ROBLOSECURITY={cookie}",
+        "User-Agent": USER_AGENT,
+    }
+    response = (session or requests).get(
+        AUTHENTICATED_USER_URL, headers=headers, timeout=10
+    )
+    if response.status_code != 200:
+        return response.status_code, None, None
+    data = response.json()
+    return 200, data.get("id"), data.get("name")
+
+
 def get_roblox_user_info(cookie: str) -> Tuple[Optional[int], Optional[str]]:
     """Fetch Roblox user information using the provided cookie."""
     try:
-        url = "https://users.roblox.com/v1/users/authenticated"
-        headers = {
-            "Cookie": f".ROBLOSECURITY={cookie}",
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-        }
-        response = requests.get(url, headers=headers, timeout=10)
+        status, user_id, username = fetch_authenticated_user(cookie)
 
-        if response.status_code == 200:
-            data = response.json()
-            return data.get("id"), data.get("name")
-        elif response.status_code == 401:
+        if status == 200:
+            return user_id, username
+        elif status == 401:
             print(f"Error: Cookie appears to be invalid or expired (Status 401)")
         else:
-            print(f"Error: Failed to fetch user info (Status {response.status_code})")
+            print(f"Error: Failed to fetch user info (Status {status})")
         return None, None
     except (requests.RequestException, requests.Timeout, requests.ConnectionError) as e:
         print(f"Error fetching user info: {e}")
@@ -266,6 +291,198 @@ def get_roblox_user_info(cookie: str) -> Tuple[Optional[int], Optional[str]]:
         return None, None
 
 
+def build_env_content(
+    ps_link: str,
+    user_id: str,
+    roblox_cookie: str,
+    check_interval=DEFAULT_CHECK_INTERVAL,
+    restart_delay=DEFAULT_RESTART_DELAY,
+    discord_webhook: str = "",
+    discord_webhook_name: str = DEFAULT_DISCORD_BOT_NAME,
+    discord_mention_user: str = "",
+    discord_enabled: str = "false",
+    notify_start: str = "true",
+    notify_rejoin: str = "true",
+    notify_error: str = "true",
+) -> str:
+    """Render the .env file for one account."""
+    return f"""PS_LINK={ps_link}
+USER_ID={user_id}
+CHECK_INTERVAL={check_interval}
+RESTART_DELAY={restart_delay}
+ROBLOX_COOKIE={roblox_cookie}
+DISCORD_WEBHOOK_URL={discord_webhook}
+DISCORD_WEBHOOK_NAME={discord_webhook_name}
+DISCORD_MENTION_USER={discord_mention_user}
+DISCORD_ENABLED={discord_enabled}
+DISCORD_NOTIFY_ON_START={notify_start}
+DISCORD_NOTIFY_ON_REJOIN={notify_rejoin}
+DISCORD_NOTIFY_ON_ERROR={notify_error}
+""".strip()
+
+
+def load_batch_file(path: str) -> List[Dict[str, str]]:
+    """Read accounts from a CSV file with a header row, or a JSON list."""
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        if path.lower().endswith(".json"):
+            entries = json.load(f)
+        else:
+            entries = list(csv.DictReader(f))
+
+    accounts = []
+    for entry in entries:
+        # Cookies are often pasted with stray whitespace or quotes
+        accounts.append(
+            {
+                key.strip().lower(): str(value).strip().strip('"')
+                for key, value in entry.items()
+                if key and value is not None
+            }
+        )
+    return accounts
+
+
+def validate_batch_account(entry: Dict[str, str], session) -> Dict[str, object]:
+    """Check one batch entry's PS link and cookie."""
+    result = {"name": entry.get("name") or None, "status": None, "error": None}
+    cookie = entry.get("roblox_cookie") or entry.get("cookie") or ""
+    if not validate_url(entry.get("ps_link", "")):
+        result["error"] = "invalid ps_link"
+        return result
+    if len(cookie) <= 10:
+        result["error"] = "missing cookie"
+        return result
+    if entry.get("check_interval") and not validate_numeric_input(
+        entry["check_interval"], 5, 3600
+    ):
+        result["error"] = "check_interval must be a number between 5 and 3600"
+        return result
+    if entry.get("restart_delay") and not validate_numeric_input(
+        entry["restart_delay"], 5, 300
+    ):
+        result["error"] = "restart_delay must be a number between 5 and 300"
+        return result
+    if entry.get("priority") and not re.fullmatch(r"-?\d+", entry["priority"]):
+        result["error"] = "priority must be a whole number"
+        return result
+
+    try:
+        status, user_id, username = fetch_authenticated_user(cookie, session)
+    except (requests.RequestException, ValueError, KeyError) as e:
+        result["error"] = f"request failed: {e}"
+        return result
+
+    result["status"] = status
+    if status == 401:
+        result["error"] = "cookie invalid or expired (401)"
+    elif status != 200 or not user_id:
+        result["error"] = f"users API returned {status}"
+    elif entry.get("user_id") and entry["user_id"] != str(user_id):
+        result["error"] = f"cookie belongs to user {user_id}, not {entry['user_id']}"
+    else:
+        result["user_id"] = str(user_id)
+        result["username"] = username
+        result["name"] = result["name"] or username
+    return result
+
+
+def write_private_file(path: str, content: str) -> None:
+    """Write a file only the current user can read, it holds a cookie."""
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "w") as f:
+        f.write(content)
+
+
+def batch_setup(path: str, output_dir: str, workers: int) -> bool:
+    """Validate a list of accounts in parallel and write a config for each."""
+    try:
+        entries = load_batch_file(path)
+    except (OSError, ValueError, AttributeError) as e:
+        print(f"Error: Could not read {path}: {e}")
+        return False
+    if not entries:
+        print(f"Error: No accounts in {path}")
+        return False
+
+    print(f"Validating {len(entries)} cookies ({workers} at a time)...")
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_maxsize=workers)
+    session.mount("https://", adapter)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = list(
+            executor.map(lambda entry: validate_batch_account(entry, session), entries)
+        )
+    session.close()
+
+    os.makedirs(output_dir, exist_ok=True)
+    fleet = []
+    used_names = set()
+    for row, (entry, result) in enumerate(zip(entries, results), start=1):
+        result["row"] = row
+        if result["error"]:
+            continue
+        name = re.sub(r"[^A-Za-z0-9_.-]", "_", result["name"] or "") or f"row{row}"
+        if name in used_names:
+            name = f"{name}_{row}"
+        used_names.add(name)
+        result["name"] = name
+        cookie = entry.get("roblox_cookie") or entry.get("cookie")
+        result["file"] = os.path.join(output_dir, f"{name}.env")
+        write_private_file(
+            result["file"],
+            build_env_content(
+                entry["ps_link"],
+                result["user_id"],
+                cookie,
+                entry.get("check_interval") or DEFAULT_CHECK_INTERVAL,
+                entry.get("restart_delay") or DEFAULT_RESTART_DELAY,
+            ),
+        )
+        fleet_entry = {
+            "name": name,
+            "package": entry.get("package") or ROBLOX_PACKAGE,
+            "user_id": result["user_id"],
+            "ps_link": entry["ps_link"],
+            "roblox_cookie": cookie,
+        }
+        if entry.get("priority"):
+            fleet_entry["priority"] = int(entry["priority"])
+        fleet.append(fleet_entry)
+
+    packages = [entry["package"] for entry in fleet]
+    if fleet and len(set(packages)) == len(packages):
+        # Accounts on separate packages can also run from one device
+        write_private_file(
+            os.path.join(output_dir, "fleet.json"), json.dumps(fleet, indent=2)
+        )
+
+    report = [
+        {
+            key: result.get(key)
+            for key in ("row", "name", "user_id", "status", "error", "file")
+        }
+        for result in results
+    ]
+    report_path = os.path.join(output_dir, "report.json")
+    with open(report_path, "w") as f:
+        json.dump(report, f, indent=2)
+
+    unauthorized = [r for r in results if r["status"] == 401]
+    other_failures = [r for r in results if r["error"] and r["status"] != 401]
+    print(f"\n{len(fleet)} of {len(results)} accounts configured in {output_dir}/")
+    if unauthorized:
+        print(f"\nInvalid or expired cookies (401): {len(unauthorized)}")
+        for r in unauthorized:
+            print(f"  row {r['row']}" + (f" ({r['name']})" if r["name"] else ""))
+    if other_failures:
+        print(f"\nOther failures: {len(other_failures)}")
+        for r in other_failures:
+            label = f"row {r['row']}" + (f" ({r['name']})" if r["name"] else "")
+            print(f"  {label}: {r['error']}")
+    print(f"\nReport saved to {report_path}\n")
+    return not unauthorized and not other_failures
+
+
 def setup() -> None:
     """Run the interactive setup wizard for Auto Rejoin configuration."""
     print("\nAuto Rejoin Setup")
@@ -383,28 +600,53 @@ def setup() -> None:
         notify_rejoin = "true"
         notify_error = "true"
 
-    env_content = f"""PS_LINK={ps_link}
-USER_ID={user_id}
-CHECK_INTERVAL={check_interval}
-RESTART_DELAY={restart_delay}
-ROBLOX_COOKIE={roblox_cookie}
-DISCORD_WEBHOOK_URL={discord_webhook}
-DISCORD_WEBHOOK_NAME={discord_webhook_name}
-DISCORD_MENTION_USER={discord_mention_user}
-DISCORD_ENABLED={discord_enabled}
-DISCORD_NOTIFY_ON_START={notify_start}
-DISCORD_NOTIFY_ON_REJOIN={notify_rejoin}
-DISCORD_NOTIFY_ON_ERROR={notify_error}
-"""
+    env_content = build_env_content(
+        ps_link,
+        user_id,
+        roblox_cookie,
+        check_interval,
+        restart_delay,
+        discord_webhook,
+        discord_webhook_name,
+        discord_mention_user,
+        discord_enabled,
+        notify_start,
+        notify_rejoin,
+        notify_error,
+    )
 
     with open(env_path, "w") as f:
-        f.write(env_content.strip())
+        f.write(env_content)
 
     print(f"\nConfiguration saved to {env_path}")
     print("Setup complete. You can now run main.py\n")
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Auto Rejoin setup")
+    parser.add_argument(
+        "--batch",
+        metavar="FILE",
+        help="CSV or JSON list of accounts (roblox_cookie, ps_link, optional name, "
+        "package, priority, user_id) to validate and configure without prompts",
+    )
+    parser.add_argument(
+        "--output",
+        default=DEFAULT_BATCH_OUTPUT,
+        help=f"folder for the per-account .env files (default: {DEFAULT_BATCH_OUTPUT})",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=DEFAULT_BATCH_WORKERS,
+        help=f"cookies validated at the same time (default: {DEFAULT_BATCH_WORKERS})",
+    )
+    args = parser.parse_args()
+    if args.batch:
+        raise SystemExit(
+            0 if batch_setup(args.batch, args.output, max(1, args.workers)) else 1
+        )
+
     try:
         setup()
     except KeyboardInterrupt: